@@ -1,11 +1,13 @@
-from .tetris_node import TetriNode
+from .tetris_node import TetriNode, TetriNodeMultiBoard
 
 NODE_CLASS_MAPPINGS = {
     "TetriNode": TetriNode,
+    "TetriNodeMultiBoard": TetriNodeMultiBoard,
 }
 
 NODE_DISPLAY_NAME_MAPPINGS = {
     "TetriNode": "TetriNode",
+    "TetriNodeMultiBoard": "TetriNode Multi-Board",
 }
 
 WEB_DIRECTORY = "./js"
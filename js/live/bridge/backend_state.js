@@ -18,6 +18,7 @@ export function createBackendStateHelpers(deps) {
     ensurePieceTextureTransforms,
     pieceCells,
     serializeState,
+    uploadCapture,
     drawBlockSized,
     getBlockStyle,
     adjustColorByFactor,
@@ -313,11 +314,70 @@ export function createBackendStateHelpers(deps) {
     return canvas.toDataURL("image/png");
   }
 
+  function writeStateWidget(node, options) {
+    const stateWidget = node.widgets?.find((w) => w.name === "state");
+    if (!stateWidget) return;
+    const stateIndex = node.widgets.indexOf(stateWidget);
+    if (!node.widgets_values) {
+      node.widgets_values = [];
+    }
+    node.__tetrisLive.state.options = options;
+    const stateValue = serializeState(node.__tetrisLive.state);
+    stateWidget.value = stateValue;
+    if (stateIndex >= 0) node.widgets_values[stateIndex] = stateValue;
+  }
+
+  // Captures are uploaded once and referenced by content hash, so the state
+  // string stays small. Only the newest pending capture is uploaded; if the
+  // route is unavailable the data URL is embedded as before. While an upload
+  // is in flight the state carries the data URL inline, and the widget is
+  // rewritten with the reference once the upload lands.
+  async function drainCaptureUploads(node) {
+    const live = node.__tetrisLive;
+    live.captureUploading = true;
+    try {
+      while (live.capturePending) {
+        const source = live.capturePending;
+        live.capturePending = null;
+        let ref = null;
+        try {
+          ref = await uploadCapture(source);
+        } catch (err) {
+          ref = null;
+        }
+        live.captureUploaded = { source, ref: ref ?? source };
+        if (!live.capturePending && live.captureSource === source) {
+          writeStateWidget(node, {
+            ...node.__tetrisLive.state.options,
+            matrix_capture: live.captureUploaded.ref,
+          });
+          if (node.widgets?.length) {
+            node.widgets_values = node.widgets.map((w) => w.value);
+          }
+        }
+      }
+    } finally {
+      live.captureUploading = false;
+    }
+  }
+
+  function captureRef(node, capture) {
+    const live = node.__tetrisLive;
+    live.captureSource = capture;
+    if (live.captureUploaded?.source === capture) {
+      return live.captureUploaded.ref;
+    }
+    live.capturePending = capture;
+    if (!live.captureUploading) {
+      drainCaptureUploads(node);
+    }
+    return capture;
+  }
+
   function updateBackendState(node) {
     if (!node?.widgets) return;
     const stateWidget = node.widgets.find((w) => w.name === "state");
     const actionWidget = node.widgets.find((w) => w.name === "action");
-    const stateIndex = node.widgets.indexOf(stateWidget);
     const actionIndex = node.widgets.indexOf(actionWidget);
     if (!node.widgets_values) {
       node.widgets_values = [];
@@ -325,13 +385,11 @@ export function createBackendStateHelpers(deps) {
     if (stateWidget) {
       const options = getOptionsForState(node);
       const capture = captureMatrixImage(node);
-      if (capture) {
-        options.matrix_capture = capture;
+      const ref = capture ? captureRef(node, capture) : null;
+      if (ref) {
+        options.matrix_capture = ref;
       }
-      node.__tetrisLive.state.options = options;
-      const stateValue = serializeState(node.__tetrisLive.state);
-      stateWidget.value = stateValue;
-      if (stateIndex >= 0) node.widgets_values[stateIndex] = stateValue;
+      writeStateWidget(node, options);
     }
     if (actionWidget) {
       actionWidget.value = "sync";
@@ -1,3 +1,4 @@
+import { api } from "../../scripts/api.js";
 import { app } from "../../scripts/app.js";
 import {
   BRUSHED_METAL_TEXTURE_DATA,
@@ -303,6 +304,17 @@ function updateAutoRepeat(state, node, deltaMs) {
   return lockRepeatHelpers.updateAutoRepeat(state, node, getConfig, deltaMs);
 }
 
+async function uploadCapture(dataUrl) {
+  const response = await api.fetchApi("/tetrinode/capture", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ data: dataUrl }),
+  });
+  if (!response.ok) return null;
+  const payload = await response.json();
+  return payload?.hash ?? null;
+}
+
 const {
   ensureBoardCache,
   updateBackendState,
@@ -325,6 +337,7 @@ const {
   ensurePieceTextureTransforms,
   pieceCells,
   serializeState,
+  uploadCapture,
   drawBlockSized,
   getBlockStyle,
   adjustColorByFactor,
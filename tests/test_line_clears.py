@@ -0,0 +1,36 @@
+"""Locks clear every full row, including ones already present in a loaded state."""
+
+import json
+
+import pytest
+
+from tetrinode.constants import BOARD_HEIGHT, BOARD_WIDTH
+from tetrinode.game.engine import _apply_action_step
+from tetrinode.game.pieces import _clear_lines
+from tetrinode.game.zobrist import _board_hash
+from tetrinode.state.codec import _default_state, _deserialize_state, _state_to_dict
+
+
+def _loaded_state(seed, full_rows):
+    payload = _state_to_dict(_default_state(seed))
+    board = payload["board"]
+    for y in full_rows:
+        board[y] = ["I"] * BOARD_WIDTH
+    # A partial row above them, so the lock lands clear of the full rows.
+    board[min(full_rows) - 1] = ["O"] * (BOARD_WIDTH - 1) + [0]
+    payload["zobrist"] = None
+    return _deserialize_state(json.dumps(payload), seed)
+
+
+@pytest.mark.parametrize("full_rows", [(BOARD_HEIGHT - 1,), (BOARD_HEIGHT - 3, BOARD_HEIGHT - 1)])
+def test_preexisting_full_rows_clear_on_next_lock(full_rows):
+    state = _loaded_state(3, full_rows)
+    expected = [list(row) for row in state.board]
+    lines_before = state.lines_cleared_total
+    _apply_action_step(state, "hard_drop")
+    assert state.lines_cleared_total == lines_before + len(full_rows)
+    assert all(fill < BOARD_WIDTH for fill in state.row_fills)
+    assert state.board_hash == _board_hash(state.board)
+    # The full-scan path clears the same rows from the board as it stood.
+    _, cleared = _clear_lines(expected)
+    assert cleared == len(full_rows)
@@ -0,0 +1,194 @@
+"""Parity of the scoring lookup tables with the if/elif ladders they replaced.
+
+The ``_ladder_*`` functions are the scoring rules as they stood before the
+tables (``tetrinode/game/scoring.py`` at 7db44da) and are kept here only as
+the reference.
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from tetrinode.game.scoring import (
+    MAX_LEVEL,
+    MAX_LINES,
+    TSPIN_TYPES,
+    _awarded_goal_lines,
+    _awarded_goal_lines_batch,
+    _calc_level,
+    _calc_level_batch,
+    _lines_to_next_level,
+    _score_action,
+    _score_action_batch,
+)
+
+ACTIONS = (*TSPIN_TYPES, "unknown")
+LEVELS = range(1, MAX_LEVEL + 1)
+LINES = range(MAX_LINES + 1)
+START_LEVELS = range(-2, MAX_LEVEL + 3)
+# Half-line steps cover mini T-spin goal awards; the top end is past the
+# last variable threshold from every start level.
+GOAL_TOTALS = [step / 2 for step in range(0, 1301)]
+
+
+def _ladder_calc_level(start_level, lines_cleared_total, progression="fixed"):
+    start = max(1, min(15, int(start_level)))
+    if progression == "variable":
+        remaining = int(lines_cleared_total)
+        level = start
+        while level < 15:
+            goal = 5 * level
+            if remaining < goal:
+                break
+            remaining -= goal
+            level += 1
+        return max(1, min(15, level))
+    return max(1, min(15, start + int(lines_cleared_total // 10)))
+
+
+def _ladder_lines_to_next_level(level, lines_total, progression="fixed", start_level=1):
+    if level >= 15:
+        return 0.0
+    if progression == "variable":
+        remaining = float(lines_total)
+        lvl = max(1, min(15, int(start_level)))
+        while lvl < 15 and remaining >= 5 * lvl:
+            remaining -= 5 * lvl
+            lvl += 1
+        if lvl >= 15:
+            return 0.0
+        return max(0.0, float(5 * lvl - remaining))
+    start = max(1, min(15, int(start_level)))
+    lines_into_level = float(lines_total) - float((level - start) * 10)
+    return max(0.0, float(10 - lines_into_level))
+
+
+def _ladder_score_action(level, lines_cleared, tspin_type, b2b_active):
+    base = 0
+    qualifies_b2b = False
+    if tspin_type == "tspin":
+        if lines_cleared == 0:
+            base = 400 * level
+        elif lines_cleared == 1:
+            base = 800 * level
+            qualifies_b2b = True
+        elif lines_cleared == 2:
+            base = 1200 * level
+            qualifies_b2b = True
+        elif lines_cleared == 3:
+            base = 1600 * level
+            qualifies_b2b = True
+    elif tspin_type == "mini":
+        if lines_cleared == 0:
+            base = 100 * level
+        else:
+            base = 200 * level
+            qualifies_b2b = True
+    else:
+        if lines_cleared == 1:
+            base = 100 * level
+        elif lines_cleared == 2:
+            base = 300 * level
+        elif lines_cleared == 3:
+            base = 500 * level
+        elif lines_cleared == 4:
+            base = 800 * level
+            qualifies_b2b = True
+
+    bonus = 0
+    next_b2b = b2b_active
+    if qualifies_b2b:
+        if b2b_active:
+            bonus = int(base * 0.5)
+        next_b2b = True
+    elif lines_cleared in {1, 2, 3}:
+        next_b2b = False
+
+    return base + bonus, next_b2b
+
+
+def _ladder_awarded_goal_lines(lines_cleared, tspin_type, b2b_active):
+    base = 0.0
+    qualifies_b2b = False
+    if tspin_type == "tspin":
+        if lines_cleared == 0:
+            base = 4.0
+        elif lines_cleared == 1:
+            base = 8.0
+            qualifies_b2b = True
+        elif lines_cleared == 2:
+            base = 12.0
+            qualifies_b2b = True
+        elif lines_cleared == 3:
+            base = 16.0
+            qualifies_b2b = True
+    elif tspin_type == "mini":
+        if lines_cleared == 0:
+            base = 1.0
+        else:
+            base = 2.0
+            qualifies_b2b = True
+    else:
+        if lines_cleared == 1:
+            base = 1.0
+        elif lines_cleared == 2:
+            base = 3.0
+        elif lines_cleared == 3:
+            base = 5.0
+        elif lines_cleared == 4:
+            base = 8.0
+            qualifies_b2b = True
+    if qualifies_b2b and b2b_active and base > 0:
+        base += base * 0.5
+    return base
+
+
+def _action_space():
+    return list(itertools.product(LEVELS, LINES, ACTIONS, (False, True)))
+
+
+def test_score_action_matches_ladder():
+    for level, lines, action, b2b in _action_space():
+        expected = _ladder_score_action(level, lines, action, b2b)
+        points, next_b2b = _score_action(level, lines, action, b2b)
+        assert (points, bool(next_b2b)) == expected, (level, lines, action, b2b)
+
+
+def test_awarded_goal_lines_match_ladder():
+    for _, lines, action, b2b in _action_space():
+        expected = _ladder_awarded_goal_lines(lines, action, b2b)
+        assert _awarded_goal_lines(lines, action, b2b) == expected, (lines, action, b2b)
+
+
+def test_batch_helpers_match_ladder():
+    space = [item for item in _action_space() if item[2] in TSPIN_TYPES]
+    levels, lines, actions, b2b = (np.array(column) for column in zip(*space))
+    tspin_ids = np.array([TSPIN_TYPES.index(action) for action in actions])
+    points, next_b2b = _score_action_batch(levels, lines, tspin_ids, b2b)
+    goals = _awarded_goal_lines_batch(lines, tspin_ids, b2b)
+    for idx, (level, cleared, action, active) in enumerate(space):
+        assert (int(points[idx]), bool(next_b2b[idx])) == _ladder_score_action(
+            level, cleared, action, active
+        )
+        assert goals[idx] == _ladder_awarded_goal_lines(cleared, action, active)
+
+
+@pytest.mark.parametrize("progression", ["fixed", "variable"])
+def test_levels_match_ladder(progression):
+    for start, total in itertools.product(START_LEVELS, GOAL_TOTALS):
+        level = _ladder_calc_level(start, total, progression)
+        assert _calc_level(start, total, progression) == level, (start, total)
+        assert _lines_to_next_level(level, total, progression, start) == pytest.approx(
+            _ladder_lines_to_next_level(level, total, progression, start)
+        ), (start, total)
+
+
+@pytest.mark.parametrize("progression", ["fixed", "variable"])
+def test_calc_level_batch_matches_ladder(progression):
+    starts, totals = (
+        np.array(column) for column in zip(*itertools.product(START_LEVELS, GOAL_TOTALS))
+    )
+    levels = _calc_level_batch(starts, totals, progression)
+    expected = [_ladder_calc_level(s, t, progression) for s, t in zip(starts, totals)]
+    assert levels.tolist() == expected
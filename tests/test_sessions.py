@@ -0,0 +1,51 @@
+"""Node ``session_id`` steps must never save a fresh game over a stored one."""
+
+import pytest
+
+from tetrinode.node_api import TetriNode
+from tetrinode.state import store
+from tetrinode.state.codec import _serialize_state, _state_to_dict
+from tetrinode.state.store import SessionDatabase
+
+SESSION = "game"
+SEED = 5
+OTHER_SEED = 9
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    db = SessionDatabase(str(tmp_path / "sessions.sqlite3"))
+    monkeypatch.setattr(store, "_DATABASE", db)
+    yield db
+    db.close()
+
+
+def _play(node, database):
+    for action in ("new", "left", "hard_drop", "hard_drop"):
+        node.step(action, "", SEED, 20, session_id=SESSION)
+    return _state_to_dict(database.load(SESSION))
+
+
+def test_stored_seed_mismatch_keeps_session(database):
+    node = TetriNode()
+    before = _play(node, database)
+    node.step("hard_drop", "", OTHER_SEED, 20, session_id=SESSION)
+    assert _state_to_dict(database.load(SESSION)) == before
+
+
+def test_rejected_state_keeps_session(database):
+    node = TetriNode()
+    before = _play(node, database)
+    incoming = _serialize_state(database.load(SESSION))
+    node.step("hard_drop", incoming, OTHER_SEED, 20, session_id=SESSION)
+    assert _state_to_dict(database.load(SESSION)) == before
+
+
+def test_matching_state_is_saved(database):
+    node = TetriNode()
+    before = _play(node, database)
+    incoming = _serialize_state(database.load(SESSION))
+    node.step("hard_drop", incoming, SEED, 20, session_id=SESSION)
+    after = _state_to_dict(database.load(SESSION))
+    assert after["seed"] == SEED
+    assert after != before
@@ -1,3 +1,11 @@
-from .node_api import TetriNode
+__all__ = ["TetriNode", "TetriNodeMultiBoard"]
 
-__all__ = ["TetriNode"]
+
+def __getattr__(name):
+    # Resolved lazily so headless users (e.g. tetrinode.env) do not pull in
+    # ComfyUI and torch just by importing a subpackage.
+    if name in __all__:
+        from . import node_api
+
+        return getattr(node_api, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
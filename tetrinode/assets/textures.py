@@ -5,44 +5,45 @@ from pathlib import Path
 
 from PIL import Image
 
+from ..cache import _register_cache
 from ..constants import TEXTURE_DATA_MAP
 
-_TEXTURE_CACHE = {}
-_TEXTURE_DATA_CACHE = {}
+_TEXTURE_CACHE = _register_cache("textures")
+_TEXTURE_DATA_CACHE = _register_cache("texture_data", max_entries=1)
 
 
 def _texture_js_path():
     return Path(__file__).resolve().parents[2] / "js" / "textures.js"
 
 
-def _load_texture_data():
-    if _TEXTURE_DATA_CACHE:
-        return _TEXTURE_DATA_CACHE
+def _read_texture_data():
+    data_map = {}
     path = _texture_js_path()
-    if not path.exists():
-        return _TEXTURE_DATA_CACHE
-    text = path.read_text(encoding="utf-8")
-    for texture_id, const_name in TEXTURE_DATA_MAP.items():
-        match = re.search(
-            rf'export const {re.escape(const_name)} = "data:image/jpeg;base64,([^"]+)";',
-            text,
-        )
-        if match:
-            _TEXTURE_DATA_CACHE[texture_id] = match.group(1)
-    return _TEXTURE_DATA_CACHE
+    if path.exists():
+        text = path.read_text(encoding="utf-8")
+        for texture_id, const_name in TEXTURE_DATA_MAP.items():
+            match = re.search(
+                rf'export const {re.escape(const_name)} = "data:image/jpeg;base64,([^"]+)";',
+                text,
+            )
+            if match:
+                data_map[texture_id] = match.group(1)
+    return data_map
 
 
-def _load_texture_image(texture_id):
-    if not texture_id:
-        return None
-    if texture_id in _TEXTURE_CACHE:
-        return _TEXTURE_CACHE[texture_id]
-    data_map = _load_texture_data()
-    payload = data_map.get(texture_id)
+def _load_texture_data():
+    return _TEXTURE_DATA_CACHE.get_or_create("js", _read_texture_data)
+
+
+def _decode_texture(texture_id):
+    payload = _load_texture_data().get(texture_id)
     if not payload:
-        _TEXTURE_CACHE[texture_id] = None
         return None
     raw = base64.b64decode(payload)
-    img = Image.open(io.BytesIO(raw)).convert("RGBA")
-    _TEXTURE_CACHE[texture_id] = img
-    return img
+    return Image.open(io.BytesIO(raw)).convert("RGBA")
+
+
+def _load_texture_image(texture_id):
+    if not texture_id:
+        return None
+    return _TEXTURE_CACHE.get_or_create(texture_id, lambda: _decode_texture(texture_id))
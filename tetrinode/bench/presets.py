@@ -0,0 +1,199 @@
+"""Render every block-style preset against golden images and time it.
+
+    python -m tetrinode.bench.presets [--update] [--json results.json]
+
+Presets are read from ``js/live/data/block_style_presets.js`` so the harness
+follows what the browser offers. Each preset renders the same seeded boards,
+tiled side by side, and is compared with ``<golden>/<preset>.png``. Cold
+latency and peak traced memory are taken with every registered cache
+cleared; warm latency is the median of ``--repeat`` renders after that.
+Pass an earlier ``--json`` file as ``--baseline`` to flag slowdowns.
+"""
+
+import argparse
+import json
+import random
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from ..cache import REGISTRY
+from ..render.board import _render_settings
+from ..render.export import _render_state_frame, _replay_states
+
+ROOT = Path(__file__).resolve().parents[2]
+PRESETS_JS = ROOT / "js" / "live" / "data" / "block_style_presets.js"
+GOLDEN_DIR = ROOT / "tests" / "artifacts" / "golden" / "presets"
+# (seed, pieces placed at random): an opening, a mid game and a crowded stack.
+BENCH_BOARDS = ((1, 0), (2, 14), (3, 30))
+# Latency deltas below this are treated as timer noise when checking a baseline.
+NOISE_FLOOR_MS = 1.0
+
+
+def _load_presets(path=PRESETS_JS):
+    text = Path(path).read_text(encoding="utf-8")
+    start = text.index("BLOCK_STYLE_PRESET_OVERRIDES")
+    presets = {}
+    for match in re.finditer(r'^\s{4}"([^"]+)":\s*\{(.*?)\}', text[start:], re.M | re.S):
+        overrides = {}
+        for key, value in re.findall(r'(\w+):\s*("[^"]*"|-?[\d.]+)', match.group(2)):
+            overrides[key] = value.strip('"') if value.startswith('"') else float(value)
+        presets[match.group(1)] = overrides
+    return presets
+
+
+def _placement_script(rng, pieces):
+    actions = []
+    for _ in range(pieces):
+        shift = rng.randint(-5, 5)
+        actions += ["rotate_cw"] * rng.randint(0, 3)
+        actions += ["left" if shift < 0 else "right"] * abs(shift)
+        actions.append("hard_drop")
+    return actions
+
+
+def _bench_states():
+    states = []
+    for seed, pieces in BENCH_BOARDS:
+        actions = _placement_script(random.Random(seed), pieces)
+        for state in _replay_states(seed, actions):
+            pass
+        states.append(state)
+    return states
+
+
+def _render_preset(style, states, block_size):
+    settings = _render_settings({"block_style": style}, 1)
+    frames = [_render_state_frame(state, block_size, **settings) for state in states]
+    return np.concatenate(frames, axis=1)
+
+
+def _slug(name):
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def _compare(image, path, tolerance):
+    if not path.exists():
+        return {"status": "missing"}
+    golden = np.asarray(Image.open(path).convert("RGB"))
+    if golden.shape != image.shape:
+        return {"status": "shape", "golden_shape": list(golden.shape)}
+    diff = np.abs(golden.astype(np.int16) - image.astype(np.int16)).max(axis=-1)
+    bad = int((diff > tolerance).sum())
+    return {
+        "status": "ok" if bad == 0 else "diff",
+        "max_diff": int(diff.max()),
+        "bad_pixels": bad,
+    }
+
+
+def _measure(style, states, block_size, repeat):
+    REGISTRY.clear()
+    started = time.perf_counter()
+    image = _render_preset(style, states, block_size)
+    cold_ms = (time.perf_counter() - started) * 1000
+    warm = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _render_preset(style, states, block_size)
+        warm.append((time.perf_counter() - started) * 1000)
+    REGISTRY.clear()
+    tracemalloc.start()
+    try:
+        _render_preset(style, states, block_size)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return image, {
+        "cold_ms": round(cold_ms, 3),
+        "warm_ms": round(statistics.median(warm), 3) if warm else None,
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def _regressions(results, baseline, max_slowdown):
+    flagged = []
+    for name, result in results.items():
+        before = baseline.get("presets", {}).get(name)
+        if not before:
+            continue
+        for key in ("cold_ms", "warm_ms"):
+            old, new = before.get(key), result.get(key)
+            if old is None or new is None:
+                continue
+            if new > old * max_slowdown and new - old > NOISE_FLOOR_MS:
+                flagged.append(f"{name}: {key} {old:.1f} -> {new:.1f}")
+    return flagged
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m tetrinode.bench.presets",
+        description="Check block-style preset renders against goldens and time them.",
+    )
+    parser.add_argument("--golden", type=Path, default=GOLDEN_DIR)
+    parser.add_argument("--update", action="store_true", help="rewrite the golden images")
+    parser.add_argument("--preset", action="append", help="only run this preset (repeatable)")
+    parser.add_argument("--block-size", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=5, help="warm renders per preset")
+    parser.add_argument("--tolerance", type=int, default=2, help="max per-channel difference")
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    parser.add_argument("--baseline", type=Path, help="earlier --json results to compare")
+    parser.add_argument("--max-slowdown", type=float, default=1.25)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    presets = _load_presets()
+    if args.preset:
+        unknown = sorted(set(args.preset) - set(presets))
+        if unknown:
+            print(f"unknown presets: {', '.join(unknown)}", file=sys.stderr)
+            return 2
+        presets = {name: presets[name] for name in args.preset}
+    states = _bench_states()
+    if args.update:
+        args.golden.mkdir(parents=True, exist_ok=True)
+    results = {}
+    failed = []
+    print(f"{'preset':<24}{'cold ms':>10}{'warm ms':>10}{'peak KiB':>11}  golden")
+    for name, style in presets.items():
+        image, result = _measure(style, states, args.block_size, max(1, args.repeat))
+        path = args.golden / f"{_slug(name)}.png"
+        if args.update:
+            Image.fromarray(image, "RGB").save(path, optimize=True)
+            result["golden"] = {"status": "updated"}
+        else:
+            result["golden"] = _compare(image, path, args.tolerance)
+            if result["golden"]["status"] != "ok":
+                failed.append(name)
+        results[name] = result
+        golden = result["golden"]
+        detail = f" (max {golden['max_diff']}, {golden['bad_pixels']} px)" if "bad_pixels" in golden else ""
+        print(
+            f"{name:<24}{result['cold_ms']:>10.1f}{result['warm_ms']:>10.1f}"
+            f"{result['peak_kib']:>11.1f}  {golden['status']}{detail}"
+        )
+    report = {"block_size": args.block_size, "boards": BENCH_BOARDS, "presets": results}
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    flagged = []
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        flagged = _regressions(results, baseline, args.max_slowdown)
+        for line in flagged:
+            print(f"slower: {line}", file=sys.stderr)
+    if failed:
+        print(f"golden mismatch: {', '.join(failed)}", file=sys.stderr)
+    return 1 if failed or flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Measure how board rendering scales across a thread pool.
+
+    python -m tetrinode.bench.threads [--threads 1 2 4 8] [--cold]
+
+Every run renders the same jobs (each preset on the bench boards from
+``tetrinode.bench.presets``) and checks the frames against a single-threaded
+pass, so a race in a shared cache shows up as a mismatch, not just a number.
+``--cold`` clears every registered cache before each run so threads also
+contend on single-flight cache population.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ..cache import REGISTRY
+from .presets import _bench_states, _load_presets, _render_preset
+
+
+def _run(jobs, states, block_size, threads):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        frames = list(pool.map(lambda style: _render_preset(style, states, block_size), jobs))
+    return frames, time.perf_counter() - started
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m tetrinode.bench.threads",
+        description="Render preset boards from a thread pool and report scaling.",
+    )
+    default_threads = sorted({1, 2, 4, os.cpu_count() or 1})
+    parser.add_argument("--threads", type=int, nargs="+", default=default_threads)
+    parser.add_argument("--rounds", type=int, default=4, help="passes over every preset")
+    parser.add_argument("--block-size", type=int, default=16)
+    parser.add_argument("--preset", action="append", help="only run this preset (repeatable)")
+    parser.add_argument("--cold", action="store_true", help="clear caches before each run")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    presets = _load_presets()
+    if args.preset:
+        presets = {name: presets[name] for name in args.preset if name in presets}
+    states = _bench_states()
+    jobs = list(presets.values()) * max(1, args.rounds)
+    reference = [_render_preset(style, states, args.block_size) for style in presets.values()]
+    print(f"{len(jobs)} renders per run, {os.cpu_count()} CPUs")
+    print(f"{'threads':>8}{'seconds':>10}{'renders/s':>11}{'speedup':>9}  frames")
+    base_rate = None
+    mismatched = False
+    for threads in args.threads:
+        if args.cold:
+            REGISTRY.clear()
+        frames, seconds = _run(jobs, states, args.block_size, max(1, threads))
+        rate = len(jobs) / seconds
+        base_rate = base_rate or rate
+        same = all(
+            np.array_equal(frame, reference[idx % len(reference)])
+            for idx, frame in enumerate(frames)
+        )
+        mismatched |= not same
+        print(
+            f"{threads:>8}{seconds:>10.2f}{rate:>11.1f}{rate / base_rate:>8.2f}x"
+            f"  {'match' if same else 'MISMATCH'}"
+        )
+    return 1 if mismatched else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
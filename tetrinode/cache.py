@@ -0,0 +1,274 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+CACHE_BUDGET_ENV = "TETRINODE_CACHE_BYTES"
+DEFAULT_CACHE_BUDGET = 256 * 1024 * 1024
+
+
+def _budget_from_env():
+    try:
+        return max(0, int(os.environ.get(CACHE_BUDGET_ENV, DEFAULT_CACHE_BUDGET)))
+    except ValueError:
+        return DEFAULT_CACHE_BUDGET
+
+
+def _sizeof(value):
+    """Approximate retained bytes for the kinds of values the caches hold."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, Image.Image):
+        return value.width * value.height * len(value.getbands())
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(_sizeof(item) for item in value.values()) + sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        return sum(_sizeof(item) for item in value) + sys.getsizeof(value)
+    return sys.getsizeof(value)
+
+
+class _Flight:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class BoundedCache:
+    """LRU mapping with byte accounting, evicted under the registry budget.
+
+    All access goes through one lock per cache. ``get_or_create`` is
+    single-flight: concurrent misses on a key wait for the first caller's
+    factory instead of building the value again.
+    """
+
+    def __init__(self, name, registry, max_entries=None, sizeof=_sizeof):
+        self.name = name
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._registry = registry
+        self._sizeof = sizeof
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            return entry[0]
+
+    def set(self, key, value):
+        size = self._sizeof(value)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            if self.max_entries is not None:
+                while len(self._entries) > self.max_entries:
+                    self._evict_locked()
+        self._registry._enforce_budget()
+        return value
+
+    def get_or_create(self, key, factory):
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry[0]
+            flight = self._inflight.get(key)
+            owner = flight is None
+            if owner:
+                self.misses += 1
+                flight = self._inflight[key] = _Flight()
+            else:
+                self.coalesced += 1
+        if not owner:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = self.set(key, factory())
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+        return flight.value
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+            self.bytes -= entry[1]
+            return entry[0]
+
+    def _evict_locked(self):
+        if not self._entries:
+            return False
+        _, (_, size) = self._entries.popitem(last=False)
+        self.bytes -= size
+        self.evictions += 1
+        return True
+
+    def evict_one(self):
+        with self._lock:
+            return self._evict_locked()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "max_entries": self.max_entries,
+            }
+
+
+class _LruCacheView:
+    """Stats adapter for functools.lru_cache caches, which bound themselves.
+
+    Only for small scalar memos (fonts, parsed styles and colors, bag
+    orders). Their bytes are not counted toward the registry budget and the
+    budget never evicts them, so anything holding arrays or images belongs
+    in a ``BoundedCache`` instead.
+    """
+
+    def __init__(self, name, func):
+        self.name = name
+        self.func = func
+        self.bytes = 0
+
+    def __len__(self):
+        return self.func.cache_info().currsize
+
+    def evict_one(self):
+        return False
+
+    def clear(self):
+        self.func.cache_clear()
+
+    def stats(self):
+        info = self.func.cache_info()
+        return {
+            "entries": info.currsize,
+            "bytes": None,
+            "hits": info.hits,
+            "misses": info.misses,
+            "coalesced": None,
+            "evictions": None,
+            "max_entries": info.maxsize,
+        }
+
+
+class CacheRegistry:
+    """Every process-wide cache, sharing one memory budget.
+
+    When the accounted total goes over budget, the cache holding the most
+    bytes gives up its least recently used entry until the total fits.
+    """
+
+    def __init__(self, budget=None):
+        self.budget = _budget_from_env() if budget is None else budget
+        self._caches = {}
+        # Taken before any cache lock, never while holding one.
+        self._lock = threading.Lock()
+
+    def register(self, name, max_entries=None, sizeof=_sizeof):
+        cache = BoundedCache(name, self, max_entries, sizeof)
+        with self._lock:
+            self._caches[name] = cache
+        return cache
+
+    def register_lru(self, name, func):
+        with self._lock:
+            self._caches[name] = _LruCacheView(name, func)
+        return func
+
+    def set_budget(self, budget):
+        self.budget = max(0, int(budget))
+        self._enforce_budget()
+
+    def total_bytes(self):
+        return sum(cache.bytes for cache in list(self._caches.values()))
+
+    def _enforce_budget(self):
+        if self.total_bytes() <= self.budget:
+            return
+        with self._lock:
+            while self.total_bytes() > self.budget:
+                cache = max(self._caches.values(), key=lambda item: item.bytes)
+                if not cache.evict_one():
+                    break
+
+    def clear(self):
+        with self._lock:
+            for cache in self._caches.values():
+                cache.clear()
+
+    def stats(self):
+        with self._lock:
+            caches = sorted(self._caches.items())
+        return {
+            "budget_bytes": self.budget,
+            "total_bytes": self.total_bytes(),
+            "caches": {name: cache.stats() for name, cache in caches},
+        }
+
+
+REGISTRY = CacheRegistry()
+
+
+def _register_cache(name, max_entries=None, sizeof=_sizeof):
+    return REGISTRY.register(name, max_entries, sizeof)
+
+
+def _register_lru_cache(name):
+    def decorator(func):
+        return REGISTRY.register_lru(name, func)
+
+    return decorator
+
+
+def _cache_stats():
+    return REGISTRY.stats()
@@ -8,6 +8,8 @@ SPAWN_Y = HIDDEN_ROWS - 2
 STATE_VERSION = 1
 PREVIEW_GRID = 4
 OUTPUT_SCALE = 3
+MAX_OUTPUT_SCALE = 3
+OUTPUT_PRECISIONS = ("float32", "float16")
 EXTRA_VISIBLE_ROWS = 1 / 3
 
 MUSIC_DIR = Path(__file__).parent / "music"
@@ -182,5 +184,3 @@ TEXTURE_DATA_MAP = {
     "brushed_metal": "BRUSHED_METAL_TEXTURE_DATA",
     "toxic_slime": "TOXIC_SLIME_TEXTURE_DATA",
 }
-_TEXTURE_CACHE = {}
-_TEXTURE_DATA_CACHE = {}
@@ -0,0 +1,141 @@
+import numpy as np
+
+from .constants import BOARD_HEIGHT, BOARD_WIDTH, SHAPES
+from .game.engine import _apply_action_step
+from .game.rng import _get_upcoming_shapes
+from .state.codec import _default_state
+
+ACTIONS = (
+    "none",
+    "left",
+    "right",
+    "down",
+    "rotate_cw",
+    "rotate_ccw",
+    "soft_drop",
+    "hard_drop",
+    "hold",
+)
+SHAPE_IDS = {shape: idx for idx, shape in enumerate(SHAPES, start=1)}
+_SHAPE_IDS = {**SHAPE_IDS, None: 0, 0: 0}
+
+
+class VectorEnv:
+    """Headless batch of TetriNode games with NumPy observations.
+
+    ``step`` takes one action index per game and returns
+    ``(obs, rewards, terminated, truncated, infos)``. Observation arrays are
+    preallocated and updated in place; copy them if they must outlive the
+    next call. Rewards are the score gained by the step.
+    """
+
+    def __init__(self, num_envs, seed=0, queue_size=5, auto_reset=True):
+        self.num_envs = num_envs
+        self.queue_size = queue_size
+        self.auto_reset = auto_reset
+        self.action_names = ACTIONS
+        self.states = [None] * num_envs
+        self._seeds = [0] * num_envs
+        self._positions = [None] * num_envs
+        self._fills = [None] * num_envs
+        self._lines = [0] * num_envs
+        self._board = np.zeros((num_envs, BOARD_HEIGHT, BOARD_WIDTH), dtype=np.uint8)
+        self._piece = np.zeros((num_envs, 4), dtype=np.int16)
+        self._hold = np.zeros(num_envs, dtype=np.int8)
+        self._queue = np.zeros((num_envs, queue_size), dtype=np.int8)
+        self._rewards = np.zeros(num_envs, dtype=np.float32)
+        self._terminated = np.zeros(num_envs, dtype=bool)
+        self._truncated = np.zeros(num_envs, dtype=bool)
+        self._final_score = np.zeros(num_envs, dtype=np.int64)
+        self.observations = {
+            "board": self._board,
+            "piece": self._piece,
+            "hold": self._hold,
+            "queue": self._queue,
+        }
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        if seed is None:
+            seeds = self._seeds
+        elif isinstance(seed, int):
+            seeds = [seed + idx for idx in range(self.num_envs)]
+        else:
+            seeds = list(seed)
+        for idx in range(self.num_envs):
+            self._reset_env(idx, seeds[idx])
+        return self.observations
+
+    def step(self, actions):
+        num_envs = self.num_envs
+        names = self.action_names
+        states = self.states
+        positions = self._positions
+        rewards = [0] * num_envs
+        terminated = [False] * num_envs
+        pieces = [None] * num_envs
+        holds = [0] * num_envs
+        if hasattr(actions, "tolist"):
+            actions = actions.tolist()
+        for idx, action in enumerate(actions):
+            state = states[idx]
+            score = state.score
+            if not state.game_over:
+                _apply_action_step(state, names[action])
+                if state.game_over and not self.auto_reset:
+                    # A game-over lock can fill cells without advancing the
+                    # sequence, so the terminal board is always observed.
+                    self._observe_sequence(idx, state)
+            rewards[idx] = state.score - score
+            if state.game_over:
+                terminated[idx] = True
+                if self.auto_reset:
+                    self._final_score[idx] = state.score
+                    state = self._reset_env(idx, self._seeds[idx] + num_envs)
+            elif state.sequence.position != positions[idx]:
+                self._observe_sequence(idx, state)
+            piece = state.piece
+            pieces[idx] = (SHAPE_IDS[piece.shape], piece.rot, piece.x, piece.y)
+            holds[idx] = _SHAPE_IDS[state.hold_piece_shape]
+        self._rewards[:] = rewards
+        self._terminated[:] = terminated
+        self._piece[:] = pieces
+        self._hold[:] = holds
+        infos = {"final_score": self._final_score}
+        return self.observations, self._rewards, self._terminated, self._truncated, infos
+
+    def _reset_env(self, idx, seed):
+        state = _default_state(seed)
+        self._seeds[idx] = seed
+        self.states[idx] = state
+        self._fills[idx] = None
+        self._observe_sequence(idx, state)
+        piece = state.piece
+        self._piece[idx] = (SHAPE_IDS[piece.shape], piece.rot, piece.x, piece.y)
+        self._hold[idx] = _SHAPE_IDS[state.hold_piece_shape]
+        return state
+
+    def _observe_sequence(self, idx, state):
+        # The board and queue only change when a piece locks or is first held,
+        # both of which draw from the sequence, so step() only calls this when
+        # the sequence position moved.
+        self._positions[idx] = state.sequence.position
+        board = state.board
+        fills = state.row_fills
+        board_obs = self._board[idx]
+        top = min(state.column_tops)
+        prev_fills = self._fills[idx]
+        if prev_fills is not None and state.lines_cleared_total == self._lines[idx]:
+            # Without a clear only the rows the piece locked into gained cells.
+            for y in range(top, BOARD_HEIGHT):
+                if fills[y] != prev_fills[y]:
+                    board_obs[y] = [cell != 0 for cell in board[y]]
+        else:
+            board_obs[:top] = 0
+            if top < BOARD_HEIGHT:
+                board_obs[top:] = [[cell != 0 for cell in board[y]] for y in range(top, BOARD_HEIGHT)]
+            self._lines[idx] = state.lines_cleared_total
+        self._fills[idx] = fills[:]
+        self._queue[idx] = [
+            _SHAPE_IDS[shape] for shape in _get_upcoming_shapes(state, self.queue_size)
+        ]
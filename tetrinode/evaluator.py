@@ -0,0 +1,332 @@
+"""Monte-Carlo placement evaluation over bag-consistent piece continuations.
+
+Each candidate placement of the current piece is scored by rollouts: the
+known preview is followed by the hidden rest of its 7-bag in a sampled
+order, then by freshly shuffled bags, and a greedy drop policy plays that
+sequence on a bitboard engine that never renders. Rollout batches run on a
+process pool and estimates are returned whenever the time budget runs out.
+"""
+
+import itertools
+import math
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .constants import BOARD_HEIGHT, BOARD_WIDTH, SHAPES, SPAWN_Y
+from .game.finesse import _placements
+from .game.rng import BAG_SIZE, _get_upcoming_shapes
+from .selfplay import _HEURISTIC_LINE_WEIGHT, _HEURISTIC_WEIGHTS
+
+ROLLOUT_DEPTH = 6
+ROLLOUT_BATCH = 8
+TOP_OUT_PENALTY = -100.0
+# Rollout seeds for evaluate(seed=s) start at s * SEED_STRIDE.
+SEED_STRIDE = 1 << 32
+_FULL_ROW = (1 << BOARD_WIDTH) - 1
+
+
+def _build_drop_tables():
+    """Per shape, every distinct (cells, x) a piece can be dropped from above."""
+    tables = {}
+    for shape, rotations in SHAPES.items():
+        seen = set()
+        drops = []
+        for rot, cells in enumerate(rotations):
+            if frozenset(cells) in seen:
+                continue
+            seen.add(frozenset(cells))
+            min_dx = min(dx for dx, _ in cells)
+            max_dx = max(dx for dx, _ in cells)
+            bottoms = {}
+            for dx, dy in cells:
+                bottoms[dx] = max(dy, bottoms.get(dx, dy))
+            for x in range(-min_dx, BOARD_WIDTH - max_dx):
+                placed = tuple((x + dx, dy) for dx, dy in cells)
+                drops.append(
+                    (rot, x, placed, tuple((x + dx, bottom) for dx, bottom in bottoms.items()))
+                )
+        tables[shape] = tuple(drops)
+    return tables
+
+
+# Read-only tables built at import, so forked pool workers share them.
+_DROP_TABLES = _build_drop_tables()
+_SPAWN_CELLS = {
+    shape: tuple((3 + dx, SPAWN_Y + dy) for dx, dy in rotations[0])
+    for shape, rotations in SHAPES.items()
+}
+
+
+def _bitboard(board):
+    rows = [sum(1 << x for x, cell in enumerate(row) if cell) for row in board]
+    return _rebuild(rows)
+
+
+def _rebuild(rows):
+    tops = [BOARD_HEIGHT] * BOARD_WIDTH
+    fills = [0] * BOARD_WIDTH
+    for y in range(BOARD_HEIGHT - 1, -1, -1):
+        bits = rows[y]
+        for x in range(BOARD_WIDTH):
+            if bits >> x & 1:
+                tops[x] = y
+                fills[x] += 1
+    return rows, tops, fills
+
+
+def _place(bitboard, cells):
+    """Lock ``cells`` into a copy of the bitboard and clear full rows."""
+    rows, tops, fills = bitboard
+    rows = list(rows)
+    tops = list(tops)
+    fills = list(fills)
+    touched = set()
+    for x, y in cells:
+        rows[y] |= 1 << x
+        fills[x] += 1
+        if y < tops[x]:
+            tops[x] = y
+        touched.add(y)
+    full = [y for y in touched if rows[y] == _FULL_ROW]
+    if not full:
+        return (rows, tops, fills), 0
+    kept = [bits for y, bits in enumerate(rows) if y not in full]
+    rows, tops, fills = _rebuild([0] * len(full) + kept)
+    return (rows, tops, fills), len(full)
+
+
+def _board_value(bitboard):
+    _, tops, fills = bitboard
+    heights = [BOARD_HEIGHT - top for top in tops]
+    aggregate = sum(heights)
+    holes = aggregate - sum(fills)
+    bumpiness = sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+    return (
+        _HEURISTIC_WEIGHTS["aggregate_height"] * aggregate
+        + _HEURISTIC_WEIGHTS["holes"] * holes
+        + _HEURISTIC_WEIGHTS["bumpiness"] * bumpiness
+    )
+
+
+def _spawn_blocked(bitboard, shape):
+    rows = bitboard[0]
+    return any(rows[y] >> x & 1 for x, y in _SPAWN_CELLS[shape])
+
+
+def _drop_cells(bitboard, drop):
+    _, _, cells, bottoms = drop
+    tops = bitboard[1]
+    y = min(tops[x] - 1 - bottom for x, bottom in bottoms)
+    if y < 0:
+        return None
+    return tuple((x, y + dy) for x, dy in cells)
+
+
+def _greedy_step(bitboard, shape):
+    best = None
+    for drop in _DROP_TABLES[shape]:
+        cells = _drop_cells(bitboard, drop)
+        if cells is None:
+            continue
+        placed, cleared = _place(bitboard, cells)
+        value = _HEURISTIC_LINE_WEIGHT * cleared + _board_value(placed)
+        if best is None or value > best[0]:
+            best = (value, placed, cleared)
+    return best
+
+
+def _continuation(rng, preview, remainder, depth):
+    shapes = list(preview[:depth])
+    hidden = list(remainder)
+    rng.shuffle(hidden)
+    shapes.extend(hidden)
+    while len(shapes) < depth:
+        bag = list(SHAPES)
+        rng.shuffle(bag)
+        shapes.extend(bag)
+    return shapes[:depth]
+
+
+def _rollout(root, preview, remainder, depth, seed):
+    """Lines and final board value after playing one sampled continuation."""
+    rng = random.Random(seed)
+    bitboard, reward = root
+    for shape in _continuation(rng, preview, remainder, depth):
+        if _spawn_blocked(bitboard, shape):
+            return reward + TOP_OUT_PENALTY
+        step = _greedy_step(bitboard, shape)
+        if step is None:
+            return reward + TOP_OUT_PENALTY
+        _, bitboard, cleared = step
+        reward += _HEURISTIC_LINE_WEIGHT * cleared
+    return reward + _board_value(bitboard)
+
+
+def _rollout_batch(index, root, preview, remainder, depth, seeds, stop_at=None):
+    """Run rollouts for ``seeds``, stopping early once wall time ``stop_at`` passes.
+
+    The deadline is wall-clock time so it means the same in every pool worker.
+    """
+    values = []
+    for seed in seeds:
+        if stop_at is not None and time.time() >= stop_at:
+            break
+        values.append(_rollout(root, preview, remainder, depth, seed))
+    return index, sum(values), sum(value * value for value in values), len(values)
+
+
+def _hidden_remainder(state, preview):
+    """Shapes left in the 7-bag after the preview, in no meaningful order.
+
+    Every other member of that bag has already been dealt or is on show, so
+    a player tracking the bag knows this set; only its order is hidden.
+    """
+    last_known = state.sequence.position + preview - 2
+    bag_end = (last_known // BAG_SIZE + 1) * BAG_SIZE - 1
+    ahead = state.sequence.peek(bag_end - state.sequence.position + 1)
+    return tuple(sorted(ahead[preview - 1 :]))
+
+
+def _candidate_roots(state):
+    bitboard = _bitboard(state.board)
+    roots = []
+    for lock, path in _placements(state.board, state.piece, state.column_tops).items():
+        cells = [(lock.x + dx, lock.y + dy) for dx, dy in SHAPES[lock.shape][lock.rot % 4]]
+        placed, cleared = _place(bitboard, cells)
+        roots.append((lock, path, (placed, _HEURISTIC_LINE_WEIGHT * cleared)))
+    return roots
+
+
+class RolloutEvaluator:
+    """Anytime placement evaluator backed by a reusable process pool.
+
+    ``workers=0`` runs rollouts in the calling process, which is slower but
+    deterministic for a given ``seed``.
+    """
+
+    def __init__(self, workers=None, depth=ROLLOUT_DEPTH, batch=ROLLOUT_BATCH):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.depth = depth
+        self.batch = batch
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def evaluate(self, state, time_budget=0.1, preview=5, seed=0, max_rollouts=None):
+        """Score every reachable placement of ``state.piece``, best first.
+
+        Runs rollout batches round-robin over the candidates until
+        ``time_budget`` seconds pass (or ``max_rollouts`` per candidate are
+        done) and returns what has been gathered by then. A candidate with
+        no finished rollout keeps its one-ply board value, which is not
+        comparable with rollout means, so such candidates (``rollouts == 0``)
+        are ranked after every sampled one.
+        """
+        deadline = time.perf_counter() + time_budget
+        # Running batches cannot be cancelled, so they stop themselves.
+        stop_at = time.time() + time_budget
+        preview_shapes = tuple(_get_upcoming_shapes(state, max(1, preview)))
+        remainder = _hidden_remainder(state, len(preview_shapes))
+        roots = _candidate_roots(state)
+        totals = [[0.0, 0.0, 0] for _ in roots]
+        limit = max_rollouts or math.inf
+        seeds = itertools.count(seed * SEED_STRIDE)
+
+        def next_task(cursor):
+            for offset in range(len(roots)):
+                index = (cursor + offset) % len(roots)
+                if totals[index][2] + pending[index] < limit:
+                    count = int(min(self.batch, limit - totals[index][2] - pending[index]))
+                    return index, [next(seeds) for _ in range(count)]
+            return None
+
+        def record(result):
+            index, total, squares, count = result
+            totals[index][0] += total
+            totals[index][1] += squares
+            totals[index][2] += count
+
+        pending = [0] * len(roots)
+        cursor = 0
+        if roots and self.workers <= 0:
+            while time.perf_counter() < deadline:
+                task = next_task(cursor)
+                if task is None:
+                    break
+                index, batch_seeds = task
+                cursor = index + 1
+                record(
+                    _rollout_batch(
+                        index,
+                        roots[index][2],
+                        preview_shapes,
+                        remainder,
+                        self.depth,
+                        batch_seeds,
+                        stop_at,
+                    )
+                )
+        elif roots:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            in_flight = {}
+            while True:
+                while len(in_flight) < self.workers * 2 and time.perf_counter() < deadline:
+                    task = next_task(cursor)
+                    if task is None:
+                        break
+                    index, batch_seeds = task
+                    cursor = index + 1
+                    pending[index] += len(batch_seeds)
+                    future = self._pool.submit(
+                        _rollout_batch,
+                        index,
+                        roots[index][2],
+                        preview_shapes,
+                        remainder,
+                        self.depth,
+                        batch_seeds,
+                        stop_at,
+                    )
+                    in_flight[future] = (index, len(batch_seeds))
+                remaining = deadline - time.perf_counter()
+                if not in_flight or remaining <= 0:
+                    break
+                done, _ = wait(in_flight, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, count = in_flight.pop(future)
+                    pending[index] -= count
+                    record(future.result())
+            for future in in_flight:
+                future.cancel()
+        results = []
+        for (lock, path, (bitboard, reward)), (total, squares, count) in zip(roots, totals):
+            if count:
+                mean = total / count
+                variance = max(0.0, squares / count - mean * mean)
+                stderr = math.sqrt(variance / count)
+            else:
+                mean = reward + _board_value(bitboard)
+                stderr = None
+            results.append(
+                {
+                    "placement": lock,
+                    "path": list(path),
+                    "value": mean,
+                    "stderr": stderr,
+                    "rollouts": count,
+                }
+            )
+        results.sort(key=lambda item: (item["rollouts"] > 0, item["value"]), reverse=True)
+        return results
@@ -2,109 +2,126 @@ from ..constants import SHAPES
 from .pieces import (
     _clear_lines,
     _collides,
+    _drop_distance,
+    _full_rows,
     _lock_piece,
     _move,
     _rotate_with_kick,
     _tspin_type,
 )
 from .rng import _pop_shape, _spawn_piece
-from .scoring import _awarded_goal_lines, _calc_level, _score_action, _update_stats
+from .scoring import (
+    _awarded_goal_lines,
+    _calc_level,
+    _gravity_ms,
+    _score_action,
+    _update_stats,
+)
+from .zobrist import _changes_hash, _rows_hash
 
 
 def _lock_and_advance_state(state_obj, board, piece, next_shape):
-    _lock_piece(board, piece)
-    state_obj["tspin"] = _tspin_type(
-        board, piece, state_obj["last_action"], state_obj["last_rotate_kick"]
+    changes = []
+    rows = _lock_piece(board, piece, state_obj.column_tops, state_obj.row_fills, changes)
+    state_obj.board_hash ^= _changes_hash(changes, piece.shape)
+    state_obj.tspin = _tspin_type(
+        board, piece, state_obj.last_action, state_obj.last_rotate_kick
     )
-    board, cleared = _clear_lines(board)
+    # Only rows between the stack top and the lowest full row move on a clear,
+    # so just those are rehashed.
+    full_rows = _full_rows(state_obj.row_fills, rows)
+    if full_rows:
+        top = min(state_obj.column_tops)
+        bottom = max(full_rows)
+        moved_hash = _rows_hash(board, top, bottom)
+    board, cleared = _clear_lines(board, state_obj.column_tops, state_obj.row_fills, rows)
+    if cleared:
+        state_obj.board_hash ^= moved_hash ^ _rows_hash(board, top, bottom)
     _update_stats(state_obj, cleared)
-    level_before = state_obj.get("level", 1)
-    prev_b2b = state_obj.get("b2b_active", False)
-    gained, next_b2b = _score_action(level_before, cleared, state_obj["tspin"], prev_b2b)
-    state_obj["score"] += gained
-    state_obj["b2b_active"] = next_b2b
-    state_obj["lines_cleared_total"] += cleared
-    progression = state_obj.get("level_progression", "fixed")
+    level_before = state_obj.level
+    prev_b2b = state_obj.b2b_active
+    gained, next_b2b = _score_action(level_before, cleared, state_obj.tspin, prev_b2b)
+    state_obj.score += gained
+    state_obj.b2b_active = next_b2b
+    state_obj.lines_cleared_total += cleared
+    progression = state_obj.level_progression
     if progression == "variable":
-        state_obj["goal_lines_total"] += _awarded_goal_lines(
+        state_obj.goal_lines_total += _awarded_goal_lines(
             cleared,
-            state_obj["tspin"],
+            state_obj.tspin,
             prev_b2b,
         )
     else:
-        state_obj["goal_lines_total"] = float(state_obj["lines_cleared_total"])
-    state_obj["level"] = _calc_level(
-        state_obj.get("start_level", 1),
-        state_obj["goal_lines_total"],
+        state_obj.goal_lines_total = float(state_obj.lines_cleared_total)
+    state_obj.level = _calc_level(
+        state_obj.start_level,
+        state_obj.goal_lines_total,
         progression,
     )
     piece = _spawn_piece(next_shape)
     next_shape = _pop_shape(state_obj)
-    state_obj["hold_used"] = False
+    state_obj.hold_used = False
+    state_obj.gravity_elapsed_ms = 0
     if _collides(board, piece):
-        state_obj["game_over"] = True
+        state_obj.game_over = True
     return board, piece, next_shape
 
 
 def _apply_action_step(state_obj, action):
-    board = state_obj["board"]
-    piece = state_obj["piece"]
-    next_shape = state_obj["next_piece_shape"]
+    board = state_obj.board
+    piece = state_obj.piece
+    next_shape = state_obj.next_piece_shape
     if action == "left":
         moved = _move(piece, -1, 0)
         if not _collides(board, moved):
             piece = moved
-            state_obj["last_action"] = "move"
-            state_obj["last_rotate_kick"] = None
+            state_obj.last_action = "move"
+            state_obj.last_rotate_kick = None
     elif action == "right":
         moved = _move(piece, 1, 0)
         if not _collides(board, moved):
             piece = moved
-            state_obj["last_action"] = "move"
-            state_obj["last_rotate_kick"] = None
+            state_obj.last_action = "move"
+            state_obj.last_rotate_kick = None
     elif action in {"down", "soft_drop"}:
         moved = _move(piece, 0, 1)
         if not _collides(board, moved):
             piece = moved
-            state_obj["last_action"] = "move"
-            state_obj["last_rotate_kick"] = None
+            state_obj.last_action = "move"
+            state_obj.last_rotate_kick = None
             if action == "soft_drop":
-                state_obj["score"] += 1
+                state_obj.score += 1
     elif action == "rotate_cw":
         piece, kick = _rotate_with_kick(board, piece, 1)
-        if piece["rot"] != state_obj["piece"]["rot"] or kick is not None:
-            state_obj["last_action"] = "rotate"
-            state_obj["last_rotate_kick"] = kick
+        if piece.rot != state_obj.piece.rot or kick is not None:
+            state_obj.last_action = "rotate"
+            state_obj.last_rotate_kick = kick
     elif action == "rotate_ccw":
         piece, kick = _rotate_with_kick(board, piece, -1)
-        if piece["rot"] != state_obj["piece"]["rot"] or kick is not None:
-            state_obj["last_action"] = "rotate"
-            state_obj["last_rotate_kick"] = kick
+        if piece.rot != state_obj.piece.rot or kick is not None:
+            state_obj.last_action = "rotate"
+            state_obj.last_rotate_kick = kick
     elif action == "hard_drop":
-        drop_distance = 0
-        moved = _move(piece, 0, 1)
-        while not _collides(board, moved):
-            piece = moved
-            drop_distance += 1
-            moved = _move(piece, 0, 1)
+        drop_distance = _drop_distance(board, piece, state_obj.column_tops)
         if drop_distance:
-            state_obj["score"] += 2 * drop_distance
+            piece = _move(piece, 0, drop_distance)
+            state_obj.score += 2 * drop_distance
     elif action == "hold":
-        if not state_obj.get("hold_used", False):
-            hold_shape = state_obj.get("hold_piece_shape")
-            state_obj["hold_used"] = True
-            state_obj["last_action"] = "hold"
-            state_obj["last_rotate_kick"] = None
-            state_obj["tspin"] = "none"
+        if not state_obj.hold_used:
+            hold_shape = state_obj.hold_piece_shape
+            state_obj.hold_used = True
+            state_obj.last_action = "hold"
+            state_obj.last_rotate_kick = None
+            state_obj.tspin = "none"
             if hold_shape in SHAPES:
-                state_obj["hold_piece_shape"] = piece["shape"]
+                state_obj.hold_piece_shape = piece.shape
                 piece = _spawn_piece(hold_shape)
             else:
-                state_obj["hold_piece_shape"] = piece["shape"]
+                state_obj.hold_piece_shape = piece.shape
                 piece = _spawn_piece(next_shape)
                 next_shape = _pop_shape(state_obj)
             if _collides(board, piece):
-                state_obj["game_over"] = True
+                state_obj.game_over = True
 
     if action not in {"hard_drop", "down", "soft_drop"}:
         moved = _move(piece, 0, 1)
@@ -117,7 +134,40 @@ def _apply_action_step(state_obj, action):
         if _collides(board, moved):
             board, piece, next_shape = _lock_and_advance_state(state_obj, board, piece, next_shape)
 
-    state_obj["board"] = board
-    state_obj["piece"] = piece
-    state_obj["next_piece_shape"] = next_shape
+    state_obj.board = board
+    state_obj.piece = piece
+    state_obj.next_piece_shape = next_shape
+    return state_obj
+
+
+def _advance_time(state_obj, elapsed_ms):
+    """Let ``elapsed_ms`` of gravity pass, locking and spawning as pieces land.
+
+    A row falls every ``_gravity_ms(level)`` and a landed piece locks on the
+    next row's tick, as with the ``none`` action. Each piece takes one drop
+    computed from the column profile rather than a step per row, and time
+    short of the next row carries over in ``gravity_elapsed_ms``.
+    """
+    elapsed_ms = max(0, int(elapsed_ms))
+    state_obj.time_ms += elapsed_ms
+    budget = state_obj.gravity_elapsed_ms + elapsed_ms
+    while not state_obj.game_over:
+        interval = _gravity_ms(state_obj.level)
+        rows = budget // interval
+        if not rows:
+            break
+        piece = state_obj.piece
+        distance = _drop_distance(state_obj.board, piece, state_obj.column_tops)
+        if rows <= distance:
+            state_obj.piece = _move(piece, 0, rows)
+            budget -= rows * interval
+            break
+        budget -= (distance + 1) * interval
+        board, piece, next_shape = _lock_and_advance_state(
+            state_obj, state_obj.board, _move(piece, 0, distance), state_obj.next_piece_shape
+        )
+        state_obj.board = board
+        state_obj.piece = piece
+        state_obj.next_piece_shape = next_shape
+    state_obj.gravity_elapsed_ms = 0 if state_obj.game_over else budget
     return state_obj
@@ -0,0 +1,136 @@
+import numpy as np
+
+from ..constants import BOARD_HEIGHT, BOARD_WIDTH, SHAPES
+from .pieces import _T_CORNER_SIDES, _T_CORNERS, _piece_cells
+
+_T_ROTATIONS = SHAPES["T"]
+
+
+def _occupancy(board):
+    """Boolean occupancy for one board or a stack of boards (..., 40, 10)."""
+    if isinstance(board, np.ndarray) and board.dtype != object:
+        return board != 0
+    return np.asarray(board, dtype=object) != 0
+
+
+def _column_heights(occ):
+    filled = occ.any(axis=-2)
+    return np.where(filled, BOARD_HEIGHT - occ.argmax(axis=-2), 0)
+
+
+def _row_transitions(occ):
+    # Walls count as filled, so a row with a gap next to a wall transitions.
+    shape = occ.shape[:-1] + (1,)
+    wall = np.ones(shape, dtype=bool)
+    padded = np.concatenate([wall, occ, wall], axis=-1)
+    return (padded[..., 1:] != padded[..., :-1]).sum(axis=-1)
+
+
+def _column_transitions(occ):
+    # The floor counts as filled; the open top does not.
+    shape = occ.shape[:-2] + (1, occ.shape[-1])
+    padded = np.concatenate([occ, np.ones(shape, dtype=bool)], axis=-2)
+    return (padded[..., 1:, :] != padded[..., :-1, :]).sum(axis=-2)
+
+
+def _well_depths(heights):
+    shape = heights.shape[:-1] + (1,)
+    wall = np.full(shape, BOARD_HEIGHT, dtype=heights.dtype)
+    padded = np.concatenate([wall, heights, wall], axis=-1)
+    neighbours = np.minimum(padded[..., :-2], padded[..., 2:])
+    return np.maximum(neighbours - heights, 0)
+
+
+def _t_slot_map(occ):
+    """Resting T placements the corner rule would score as a full T-spin.
+
+    Returns a bool array (..., 4, 42, 12) indexed by rotation and by the piece
+    origin shifted by two cells, so ``[rot, y + 2, x + 2]`` is piece (x, y).
+    Cells outside the board count as occupied, as in ``_corner_occupied``.
+    """
+    lead = occ.shape[:-2]
+    pad = [(0, 0)] * len(lead) + [(2, 3), (2, 2)]
+    solid = np.pad(occ, pad, constant_values=True)
+    rows = BOARD_HEIGHT + 2
+    cols = BOARD_WIDTH + 2
+
+    def at(dx, dy):
+        return solid[..., dy : dy + rows, dx : dx + cols]
+
+    corners = {key: at(dx, dy).astype(np.int8) for key, (dx, dy) in _T_CORNERS.items()}
+    slots = []
+    for rot, cells in enumerate(_T_ROTATIONS):
+        fits = np.ones(lead + (rows, cols), dtype=bool)
+        rests = np.zeros(lead + (rows, cols), dtype=bool)
+        for dx, dy in cells:
+            fits &= ~at(dx, dy)
+            rests |= at(dx, dy + 1)
+        front, back = _T_CORNER_SIDES[rot]
+        front_hits = corners[front[0]] + corners[front[1]]
+        back_hits = corners[back[0]] + corners[back[1]]
+        slots.append(fits & rests & (front_hits == 2) & (back_hits >= 1))
+    return np.stack(slots, axis=-3)
+
+
+def _t_slots(board):
+    """List the (rot, x, y) T placements on a single board that are T-spin slots."""
+    slot_map = _t_slot_map(_occupancy(board))
+    return [(int(rot), int(x) - 2, int(y) - 2) for rot, y, x in np.argwhere(slot_map)]
+
+
+def _features_from(occ, heights, filled):
+    holes = heights - filled
+    wells = _well_depths(heights)
+    return {
+        "heights": heights,
+        "aggregate_height": heights.sum(axis=-1),
+        "max_height": heights.max(axis=-1),
+        "holes": holes.sum(axis=-1),
+        "column_holes": holes,
+        "bumpiness": np.abs(np.diff(heights, axis=-1)).sum(axis=-1),
+        "wells": wells,
+        "max_well": wells.max(axis=-1),
+        "row_transitions": _row_transitions(occ).sum(axis=-1),
+        "column_transitions": _column_transitions(occ).sum(axis=-1),
+        "t_slots": _t_slot_map(occ).sum(axis=(-3, -2, -1)),
+    }
+
+
+def _board_features(board):
+    """Stack features for one board (scalars) or a (N, 40, 10) stack (arrays)."""
+    occ = _occupancy(board)
+    return _features_from(occ, _column_heights(occ), occ.sum(axis=-2))
+
+
+class FeatureTracker:
+    """Board features for one game kept current across locks.
+
+    Column heights and fill counts are adjusted from the locked cells; only a
+    line clear falls back to a full recompute.
+    """
+
+    __slots__ = ("occ", "heights", "filled")
+
+    def __init__(self, board):
+        self.reset(board)
+
+    def reset(self, board):
+        self.occ = np.array(_occupancy(board))
+        self.heights = _column_heights(self.occ)
+        self.filled = self.occ.sum(axis=-2)
+
+    def lock(self, board, piece, cleared=0):
+        if cleared:
+            self.reset(board)
+            return
+        occ = self.occ
+        heights = self.heights
+        filled = self.filled
+        for x, y in _piece_cells(piece):
+            if 0 <= y < BOARD_HEIGHT and 0 <= x < BOARD_WIDTH and not occ[y, x]:
+                occ[y, x] = True
+                filled[x] += 1
+                heights[x] = max(heights[x], BOARD_HEIGHT - y)
+
+    def features(self):
+        return _features_from(self.occ, self.heights, self.filled)
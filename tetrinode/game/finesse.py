@@ -0,0 +1,155 @@
+from collections import deque
+
+from ..cache import _register_cache
+from ..constants import BOARD_HEIGHT, BOARD_WIDTH, SHAPES
+from ..state.schema import Piece
+from .pieces import _column_tops, _kick_table
+
+# Actions tried from every search node, in tie-break order. "down" is kept
+# over "soft_drop" (same movement, no score) and "hold" changes the piece.
+FINESSE_ACTIONS = ("left", "right", "rotate_cw", "rotate_ccw", "down", "none", "hard_drop")
+MAX_FINESSE_ENTRIES = 4096
+
+# Collision masks are Python ints over y, offset so rows above the board
+# (and the floor below it) read as blocked, indexed by x offset by _X_PAD so
+# shifted and kicked pieces test against the walls without bounds checks.
+_Y_PAD = 8
+_X_PAD = 6
+_CEILING = (1 << _Y_PAD) - 1
+_PATH_CACHE = _register_cache("finesse_paths", max_entries=MAX_FINESSE_ENTRIES)
+
+
+def _surface_profile(board, column_tops=None):
+    """Column tops plus the buried empty cells: the board without its colors."""
+    tops = tuple(column_tops if column_tops is not None else _column_tops(board))
+    holes = tuple(
+        (x, y)
+        for x, top in enumerate(tops)
+        for y in range(top + 1, BOARD_HEIGHT)
+        if not board[y][x]
+    )
+    return tops, holes
+
+
+def _blocked_masks(shape, profile):
+    """Per rotation and x, an int whose bit ``y + _Y_PAD`` is set when the piece collides."""
+    tops, holes = profile
+    columns = [(~0 << (top + _Y_PAD)) | _CEILING for top in tops]
+    for x, y in holes:
+        columns[x] &= ~(1 << (y + _Y_PAD))
+    masks = []
+    for cells in SHAPES[shape]:
+        per_x = []
+        for x in range(-_X_PAD, BOARD_WIDTH + _X_PAD):
+            bits = 0
+            for dx, dy in cells:
+                col = x + dx
+                bits |= (columns[col] if 0 <= col < BOARD_WIDTH else ~0) >> dy
+            per_x.append(bits)
+        masks.append(per_x)
+    return masks
+
+
+def _search(shape, start, profile):
+    """BFS over (rot, x, y) with ``_apply_action_step`` semantics.
+
+    Every action except down/soft/hard drop is followed by one row of
+    gravity, and a piece that cannot fall after an action locks where it
+    is. Returns the shortest action tuple for each reachable lock position.
+    """
+    masks = _blocked_masks(shape, profile)
+    kicks = {
+        (rot, delta): _kick_table(shape, rot, (rot + delta) % 4)
+        for rot in range(4)
+        for delta in (1, -1)
+    }
+
+    parents = {start: None}
+    locks = {}
+    queue = deque([start])
+    push = queue.append
+
+    def visit(node, action, rot, x, y, locked):
+        if locked:
+            if (rot, x, y) not in locks:
+                locks[rot, x, y] = (node, action)
+        elif (rot, x, y) not in parents:
+            parents[rot, x, y] = (node, action)
+            push((rot, x, y))
+
+    def gravity(node, action, rot, x, y):
+        # Any action but a drop ends with one row of gravity, or a lock.
+        if masks[rot][x + _X_PAD] >> (y + _Y_PAD + 1) & 1:
+            visit(node, action, rot, x, y, True)
+        else:
+            visit(node, action, rot, x, y + 1, False)
+
+    rot, x, y = start
+    if masks[rot][x + _X_PAD] >> (y + _Y_PAD) & 1:
+        return {}
+    while queue:
+        node = queue.popleft()
+        rot, x, y = node
+        row = masks[rot]
+        bit = y + _Y_PAD
+        gravity(node, "left", rot, x if row[x - 1 + _X_PAD] >> bit & 1 else x - 1, y)
+        gravity(node, "right", rot, x if row[x + 1 + _X_PAD] >> bit & 1 else x + 1, y)
+        for action, delta in (("rotate_cw", 1), ("rotate_ccw", -1)):
+            target = (rot + delta) % 4
+            for dx, dy in kicks[rot, delta]:
+                if not masks[target][x + dx + _X_PAD] >> (bit + dy) & 1:
+                    gravity(node, action, target, x + dx, y + dy)
+                    break
+            else:
+                gravity(node, action, rot, x, y)
+        below = row[x + _X_PAD] >> (bit + 1)
+        if below & 1:
+            visit(node, "down", rot, x, y, True)
+        else:
+            visit(node, "down", rot, x, y + 1, bool(below & 2))
+        gravity(node, "none", rot, x, y)
+        visit(node, "hard_drop", rot, x, y + (below & -below).bit_length() - 1, True)
+
+    def path_to(node, last):
+        actions = [last]
+        while parents[node] is not None:
+            node, action = parents[node]
+            actions.append(action)
+        return tuple(reversed(actions))
+
+    return {lock: path_to(node, action) for lock, (node, action) in locks.items()}
+
+
+def _placements(board, piece, column_tops=None):
+    """Map every reachable lock position of ``piece`` to its shortest action path.
+
+    Results are memoized per (shape, start position, surface profile), so
+    the colors on the board and repeated boards cost nothing extra.
+    """
+    profile = _surface_profile(board, column_tops)
+    start = (piece.rot % 4, piece.x, piece.y)
+    locks = _PATH_CACHE.get_or_create(
+        (piece.shape, start, profile), lambda: _search(piece.shape, start, profile)
+    )
+    return {Piece(piece.shape, rot, x, y): path for (rot, x, y), path in locks.items()}
+
+
+def _finesse_path(board, piece, target, column_tops=None):
+    """Shortest actions that lock ``piece`` at ``target``, or None if unreachable.
+
+    A target with no exact (rot, x, y) match is met by any lock position
+    covering the same cells, so O-piece and mirrored rotations still resolve.
+    """
+    placements = _placements(board, piece, column_tops)
+    path = placements.get(Piece(piece.shape, target.rot % 4, target.x, target.y))
+    if path is not None:
+        return list(path)
+    cells = _cell_set(target)
+    matches = [path for lock, path in placements.items() if _cell_set(lock) == cells]
+    return list(min(matches, key=len)) if matches else None
+
+
+def _cell_set(piece):
+    return frozenset(
+        (piece.x + dx, piece.y + dy) for dx, dy in SHAPES[piece.shape][piece.rot % 4]
+    )
@@ -1,12 +1,33 @@
 from ..constants import BOARD_HEIGHT, BOARD_WIDTH, SHAPES
+from ..state.schema import Piece
+
+
+def _shape_bottoms(cells):
+    bottoms = {}
+    for dx, dy in cells:
+        bottoms[dx] = max(dy, bottoms.get(dx, dy))
+    return tuple(sorted(bottoms.items()))
+
+
+_EMPTY_ROW = (0,) * BOARD_WIDTH
+
+# Lowest occupied offset per column for every shape rotation, used to drop a
+# piece straight onto the column surface instead of stepping row by row.
+_PIECE_BOTTOMS = {
+    shape: tuple(_shape_bottoms(cells) for cells in rotations)
+    for shape, rotations in SHAPES.items()
+}
 
 def _piece_cells(piece):
-    shape = SHAPES[piece["shape"]][piece["rot"] % 4]
-    return [(piece["x"] + dx, piece["y"] + dy) for dx, dy in shape]
+    shape = SHAPES[piece.shape][piece.rot % 4]
+    return [(piece.x + dx, piece.y + dy) for dx, dy in shape]
 
 
 def _collides(board, piece):
-    for x, y in _piece_cells(piece):
+    shape, rot, px, py = piece
+    for dx, dy in SHAPES[shape][rot % 4]:
+        x = px + dx
+        y = py + dy
         if x < 0 or x >= BOARD_WIDTH or y < 0 or y >= BOARD_HEIGHT:
             return True
         if board[y][x]:
@@ -14,62 +35,129 @@ def _collides(board, piece):
     return False
 
 
-def _lock_piece(board, piece):
+def _lock_piece(board, piece, column_tops=None, row_fills=None, changes=None):
+    """Write the piece into the board and return the rows it touched.
+
+    ``changes`` collects ``(x, y, previous)`` for every cell whose value
+    changed; a piece force-locked at game over can overwrite filled cells.
+    """
+    rows = []
     for x, y in _piece_cells(piece):
         if 0 <= y < BOARD_HEIGHT and 0 <= x < BOARD_WIDTH:
-            board[y][x] = piece["shape"]
+            row = board[y]
+            previous = row[x]
+            if row_fills is not None and previous == 0:
+                row_fills[y] += 1
+            if changes is not None and previous != piece.shape:
+                changes.append((x, y, previous))
+            row[x] = piece.shape
+            if column_tops is not None and y < column_tops[x]:
+                column_tops[x] = y
+            if y not in rows:
+                rows.append(y)
+    return rows
+
+
+def _full_rows(row_fills, rows):
+    """Sorted full rows, checking only ``rows`` unless others are full too."""
+    full_rows = sorted(y for y in rows if row_fills[y] >= BOARD_WIDTH)
+    # A loaded state can already hold full rows that the lock never touched.
+    if row_fills.count(BOARD_WIDTH) != len(full_rows):
+        full_rows = [y for y, fill in enumerate(row_fills) if fill >= BOARD_WIDTH]
+    return full_rows
+
+
+def _clear_lines(board, column_tops=None, row_fills=None, rows=None):
+    if row_fills is not None and rows is not None:
+        full_rows = _full_rows(row_fills, rows)
+    else:
+        full_rows = [y for y, row in enumerate(board) if all(cell != 0 for cell in row)]
+    cleared = len(full_rows)
+    if not cleared:
+        return board, 0
+    # Compact in place: lift the cleared row objects out, blank them and reuse
+    # them as the new top rows so the board never reallocates.
+    recycled = []
+    for y in reversed(full_rows):
+        row = board.pop(y)
+        row[:] = _EMPTY_ROW
+        recycled.append(row)
+        if row_fills is not None:
+            del row_fills[y]
+    board[0:0] = recycled
+    if row_fills is not None:
+        row_fills[0:0] = _EMPTY_ROW[:cleared]
+    if column_tops is not None:
+        for x, top in enumerate(column_tops):
+            if top in full_rows:
+                column_tops[x] = _column_top(board, x, top + 1)
+            else:
+                column_tops[x] = top + cleared
+    return board, cleared
+
+
+def _row_fills(board):
+    return [sum(1 for cell in row if cell != 0) for row in board]
+
+
+def _column_top(board, x, start=0):
+    for y in range(start, BOARD_HEIGHT):
+        if board[y][x]:
+            return y
+    return BOARD_HEIGHT
 
 
-def _clear_lines(board):
-    remaining = [row for row in board if any(cell == 0 for cell in row)]
-    cleared = BOARD_HEIGHT - len(remaining)
-    for _ in range(cleared):
-        remaining.insert(0, [0 for _ in range(BOARD_WIDTH)])
-    return remaining, cleared
+def _column_tops(board):
+    return [_column_top(board, x) for x in range(BOARD_WIDTH)]
 
 
 def _move(piece, dx, dy):
-    return {"shape": piece["shape"], "rot": piece["rot"], "x": piece["x"] + dx, "y": piece["y"] + dy}
+    return Piece(piece.shape, piece.rot, piece.x + dx, piece.y + dy)
 
 
 def _rotate(piece, delta):
-    return {"shape": piece["shape"], "rot": (piece["rot"] + delta) % 4, "x": piece["x"], "y": piece["y"]}
+    return Piece(piece.shape, (piece.rot + delta) % 4, piece.x, piece.y)
+
+
+_O_KICKS = [(0, 0)]
+_I_KICKS = {
+    (0, 1): [(0, 0), (-2, 0), (1, 0), (-2, 1), (1, -2)],
+    (1, 0): [(0, 0), (2, 0), (-1, 0), (2, -1), (-1, 2)],
+    (1, 2): [(0, 0), (-1, 0), (2, 0), (-1, -2), (2, 1)],
+    (2, 1): [(0, 0), (1, 0), (-2, 0), (1, 2), (-2, -1)],
+    (2, 3): [(0, 0), (2, 0), (-1, 0), (2, -1), (-1, 2)],
+    (3, 2): [(0, 0), (-2, 0), (1, 0), (-2, 1), (1, -2)],
+    (3, 0): [(0, 0), (1, 0), (-2, 0), (1, 2), (-2, -1)],
+    (0, 3): [(0, 0), (-1, 0), (2, 0), (-1, -2), (2, 1)],
+}
+_JLSTZ_KICKS = {
+    (0, 1): [(0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)],
+    (1, 0): [(0, 0), (1, 0), (1, 1), (0, -2), (1, -2)],
+    (1, 2): [(0, 0), (1, 0), (1, 1), (0, -2), (1, -2)],
+    (2, 1): [(0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)],
+    (2, 3): [(0, 0), (1, 0), (1, -1), (0, 2), (1, 2)],
+    (3, 2): [(0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)],
+    (3, 0): [(0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)],
+    (0, 3): [(0, 0), (1, 0), (1, -1), (0, 2), (1, 2)],
+}
 
 
 def _kick_table(shape, rot_from, rot_to):
     if shape == "O":
-        return [(0, 0)]
-    if shape == "I":
-        table = {
-            (0, 1): [(0, 0), (-2, 0), (1, 0), (-2, 1), (1, -2)],
-            (1, 0): [(0, 0), (2, 0), (-1, 0), (2, -1), (-1, 2)],
-            (1, 2): [(0, 0), (-1, 0), (2, 0), (-1, -2), (2, 1)],
-            (2, 1): [(0, 0), (1, 0), (-2, 0), (1, 2), (-2, -1)],
-            (2, 3): [(0, 0), (2, 0), (-1, 0), (2, -1), (-1, 2)],
-            (3, 2): [(0, 0), (-2, 0), (1, 0), (-2, 1), (1, -2)],
-            (3, 0): [(0, 0), (1, 0), (-2, 0), (1, 2), (-2, -1)],
-            (0, 3): [(0, 0), (-1, 0), (2, 0), (-1, -2), (2, 1)],
-        }
-        return table.get((rot_from, rot_to), [(0, 0)])
-    table = {
-        (0, 1): [(0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)],
-        (1, 0): [(0, 0), (1, 0), (1, 1), (0, -2), (1, -2)],
-        (1, 2): [(0, 0), (1, 0), (1, 1), (0, -2), (1, -2)],
-        (2, 1): [(0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)],
-        (2, 3): [(0, 0), (1, 0), (1, -1), (0, 2), (1, 2)],
-        (3, 2): [(0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)],
-        (3, 0): [(0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)],
-        (0, 3): [(0, 0), (1, 0), (1, -1), (0, 2), (1, 2)],
-    }
-    return table.get((rot_from, rot_to), [(0, 0)])
+        return list(_O_KICKS)
+    table = _I_KICKS if shape == "I" else _JLSTZ_KICKS
+    return list(table.get((rot_from, rot_to), _O_KICKS))
 
 
 def _rotate_with_kick(board, piece, delta):
-    rot_from = piece["rot"] % 4
+    rot_from = piece.rot % 4
     rot_to = (rot_from + delta) % 4
-    kicks = _kick_table(piece["shape"], rot_from, rot_to)
+    if piece.shape == "O":
+        kicks = _O_KICKS
+    else:
+        kicks = (_I_KICKS if piece.shape == "I" else _JLSTZ_KICKS).get((rot_from, rot_to), _O_KICKS)
     for idx, (dx, dy) in enumerate(kicks):
-        candidate = {"shape": piece["shape"], "rot": rot_to, "x": piece["x"] + dx, "y": piece["y"] + dy}
+        candidate = Piece(piece.shape, rot_to, piece.x + dx, piece.y + dy)
         if not _collides(board, candidate):
             return candidate, idx
     return piece, None
@@ -81,37 +169,20 @@ def _corner_occupied(board, x, y):
     return board[y][x] != 0
 
 
-def _tspin_type_from_corners(board, piece):
-    if piece["shape"] != "T":
-        return "none"
-    cx = piece["x"] + 1
-    cy = piece["y"] + 1
-    corners = {
-        "A": (cx - 1, cy - 1),
-        "B": (cx + 1, cy - 1),
-        "C": (cx - 1, cy + 1),
-        "D": (cx + 1, cy + 1),
-    }
-    rot = piece["rot"] % 4
-    if rot == 0:
-        front = ("A", "B")
-        back = ("C", "D")
-    elif rot == 1:
-        front = ("B", "D")
-        back = ("A", "C")
-    elif rot == 2:
-        front = ("C", "D")
-        back = ("A", "B")
-    else:
-        front = ("A", "C")
-        back = ("B", "D")
-    front_hits = sum(_corner_occupied(board, *corners[k]) for k in front)
-    back_hits = sum(_corner_occupied(board, *corners[k]) for k in back)
-    total_hits = front_hits + back_hits
-    if total_hits < 3:
+# T corner offsets from the piece origin, and the (front, back) corner
+# pairs for each rotation.
+_T_CORNERS = {"A": (0, 0), "B": (2, 0), "C": (0, 2), "D": (2, 2)}
+_T_CORNER_SIDES = (
+    (("A", "B"), ("C", "D")),
+    (("B", "D"), ("A", "C")),
+    (("C", "D"), ("A", "B")),
+    (("A", "C"), ("B", "D")),
+)
+
+
+def _tspin_from_hits(front_hits, back_hits):
+    if front_hits + back_hits < 3:
         return "none"
-    if front_hits == 2 and back_hits == 2:
-        return "tspin"
     if front_hits == 2 and back_hits >= 1:
         return "tspin"
     if back_hits == 2 and front_hits >= 1:
@@ -119,8 +190,23 @@ def _tspin_type_from_corners(board, piece):
     return "none"
 
 
+def _tspin_type_from_corners(board, piece):
+    if piece.shape != "T":
+        return "none"
+    front, back = _T_CORNER_SIDES[piece.rot % 4]
+    front_hits = sum(
+        _corner_occupied(board, piece.x + _T_CORNERS[k][0], piece.y + _T_CORNERS[k][1])
+        for k in front
+    )
+    back_hits = sum(
+        _corner_occupied(board, piece.x + _T_CORNERS[k][0], piece.y + _T_CORNERS[k][1])
+        for k in back
+    )
+    return _tspin_from_hits(front_hits, back_hits)
+
+
 def _tspin_type(board, piece, last_action, last_rotate_kick):
-    if piece["shape"] != "T" or last_action != "rotate":
+    if piece.shape != "T" or last_action != "rotate":
         return "none"
     corners = _tspin_type_from_corners(board, piece)
     if corners == "none":
@@ -129,10 +215,29 @@ def _tspin_type(board, piece, last_action, last_rotate_kick):
         return "tspin"
     return corners
 
-def _ghost_piece(board, piece):
-    ghost = dict(piece)
-    moved = _move(ghost, 0, 1)
+def _drop_distance(board, piece, column_tops=None):
+    if column_tops is not None and piece.y >= 0:
+        distance = BOARD_HEIGHT
+        for dx, bottom in _PIECE_BOTTOMS[piece.shape][piece.rot % 4]:
+            x = piece.x + dx
+            y = piece.y + bottom
+            if x < 0 or x >= BOARD_WIDTH or y >= column_tops[x]:
+                # Tucked under an overhang (or out of bounds): the surface
+                # profile says nothing about the cells below, so step instead.
+                break
+            distance = min(distance, column_tops[x] - 1 - y)
+        else:
+            return distance
+    distance = 0
+    moved = _move(piece, 0, 1)
     while not _collides(board, moved):
-        ghost = moved
-        moved = _move(ghost, 0, 1)
-    return ghost
+        distance += 1
+        moved = _move(moved, 0, 1)
+    return distance
+
+
+def _ghost_piece(board, piece, column_tops=None):
+    distance = _drop_distance(board, piece, column_tops)
+    if not distance:
+        return piece
+    return _move(piece, 0, distance)
@@ -1,25 +1,86 @@
 import random
+from collections import deque
+from functools import lru_cache
+from itertools import islice
 
+from ..cache import _register_lru_cache
 from ..constants import BOARD_HEIGHT, BOARD_WIDTH, SHAPES, SPAWN_Y
+from ..state.schema import Piece
+
+BAG_SIZE = len(SHAPES)
+
 
 def _empty_board():
     return [[0 for _ in range(BOARD_WIDTH)] for _ in range(BOARD_HEIGHT)]
 
 
-def _new_bag(seed, bag_count):
+@_register_lru_cache("bag_orders")
+@lru_cache(maxsize=4096)
+def _bag_order(seed, bag_count):
     rng = random.Random(seed + bag_count)
     bag = list(SHAPES.keys())
     rng.shuffle(bag)
-    return bag
+    return tuple(bag)
+
+
+def _new_bag(seed, bag_count):
+    return list(_bag_order(seed, bag_count))
+
+
+class PieceSequence:
+    """Lazy 7-bag piece stream for one seed.
+
+    The ring buffer holds the rest of the current bag followed by any bags
+    generated ahead of time by ``peek``. ``bag`` and ``bag_count`` only report
+    the committed part, so they serialize exactly like the old list-based bag.
+    """
+
+    __slots__ = ("seed", "_buffer", "_current", "_committed")
+
+    def __init__(self, seed, bag=(), bag_count=0):
+        self.seed = seed
+        self._buffer = deque(bag)
+        self._current = len(self._buffer)
+        self._committed = bag_count
+
+    @property
+    def bag(self):
+        return list(islice(self._buffer, self._current))
+
+    @property
+    def bag_count(self):
+        return self._committed
+
+    @property
+    def position(self):
+        return self._committed * BAG_SIZE - self._current
+
+    def pop(self):
+        if not self._current:
+            if not self._buffer:
+                self._buffer.extend(_bag_order(self.seed, self._committed))
+            self._committed += 1
+            self._current = BAG_SIZE
+        self._current -= 1
+        return self._buffer.popleft()
+
+    def peek(self, count):
+        next_bag = self._committed + (len(self._buffer) - self._current) // BAG_SIZE
+        while len(self._buffer) < count:
+            self._buffer.extend(_bag_order(self.seed, next_bag))
+            next_bag += 1
+        return list(islice(self._buffer, count))
 
 
 def _pop_shape(state):
-    if not state["bag"]:
-        state["bag"] = _new_bag(state["seed"], state["bag_count"])
-        state["bag_count"] += 1
-    return state["bag"].pop(0)
+    return state.sequence.pop()
 
 
-def _spawn_piece(shape):
-    return {"shape": shape, "rot": 0, "x": 3, "y": SPAWN_Y}
+def _get_upcoming_shapes(state, count):
+    if count <= 0:
+        return []
+    return [state.next_piece_shape] + state.sequence.peek(count - 1)
 
+
+def _spawn_piece(shape):
+    return Piece(shape, 0, 3, SPAWN_Y)
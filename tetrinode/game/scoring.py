@@ -1,124 +1,164 @@
+import numpy as np
+
+MAX_LEVEL = 15
+MAX_LINES = 4
+TSPIN_TYPES = ("none", "mini", "tspin")
+_TSPIN_INDEX = {name: idx for idx, name in enumerate(TSPIN_TYPES)}
+
+# Guideline base points per level and back-to-back eligibility, indexed by
+# [tspin type][lines cleared].
+_ACTION_RULES = (
+    ((0, False), (100, False), (300, False), (500, False), (800, True)),
+    ((100, False), (200, True), (200, True), (200, True), (200, True)),
+    ((400, False), (800, True), (1200, True), (1600, True), (0, False)),
+)
+
+
+def _build_action_tables():
+    score = np.zeros((len(TSPIN_TYPES), MAX_LINES + 1, 2), dtype=np.int64)
+    goal = np.zeros((len(TSPIN_TYPES), MAX_LINES + 1, 2), dtype=np.float64)
+    b2b = np.zeros((len(TSPIN_TYPES), MAX_LINES + 1, 2), dtype=np.bool_)
+    for tspin_idx, row in enumerate(_ACTION_RULES):
+        for lines, (base, qualifies) in enumerate(row):
+            for active in (0, 1):
+                bonus = qualifies and active
+                score[tspin_idx, lines, active] = base + (base // 2 if bonus else 0)
+                goal[tspin_idx, lines, active] = base / 100.0 * (1.5 if bonus else 1.0)
+                if qualifies:
+                    b2b[tspin_idx, lines, active] = True
+                elif lines in {1, 2, 3}:
+                    b2b[tspin_idx, lines, active] = False
+                else:
+                    b2b[tspin_idx, lines, active] = bool(active)
+    return score, goal, b2b
+
+
+# Points per level, awarded goal lines and next back-to-back flag, indexed by
+# [tspin type][lines cleared][b2b active].
+SCORE_TABLE, GOAL_TABLE, B2B_TABLE = _build_action_tables()
+# Nested-list copies for the scalar path, where NumPy scalar indexing is slower.
+_SCORE_ROWS = SCORE_TABLE.tolist()
+_GOAL_ROWS = GOAL_TABLE.tolist()
+_B2B_ROWS = B2B_TABLE.tolist()
+
+
+def _build_level_tables():
+    thresholds = {}
+    levels = {}
+    for start in range(1, MAX_LEVEL + 1):
+        cumulative = [0]
+        for level in range(start, MAX_LEVEL):
+            cumulative.append(cumulative[-1] + 5 * level)
+        thresholds[start] = tuple(cumulative)
+        table = []
+        for step in range(len(cumulative) - 1):
+            table.extend([start + step] * (cumulative[step + 1] - cumulative[step]))
+        table.append(MAX_LEVEL)
+        levels[start] = tuple(table)
+    return thresholds, levels
+
+
+# Cumulative variable-goal thresholds per start level, and the level reached
+# for every whole number of goal lines up to the last threshold.
+GOAL_THRESHOLDS, VARIABLE_LEVELS = _build_level_tables()
+_VARIABLE_LEVEL_ARRAY = np.full(
+    (MAX_LEVEL + 1, len(VARIABLE_LEVELS[1])), MAX_LEVEL, dtype=np.int64
+)
+for _start, _levels in VARIABLE_LEVELS.items():
+    _VARIABLE_LEVEL_ARRAY[_start, : len(_levels)] = _levels
+del _start, _levels
+
+
+def _clamp_level(level):
+    return max(1, min(MAX_LEVEL, int(level)))
+
+
+def _fall_seconds(level):
+    """Seconds per gravity row, as ``fallSpeedSeconds`` in js/live/core/gameplay.js."""
+    level = _clamp_level(level)
+    return (0.8 - (level - 1) * 0.007) ** (level - 1)
+
+
+# Whole milliseconds per gravity row by level, rounded like the frontend's
+# ``Math.round`` so both sides agree on when a row falls.
+GRAVITY_MS = (0,) + tuple(
+    max(1, int(_fall_seconds(level) * 1000 + 0.5)) for level in range(1, MAX_LEVEL + 1)
+)
+
+
+def _gravity_ms(level):
+    return GRAVITY_MS[_clamp_level(level)]
+
+
+def _variable_level(start, lines_total):
+    table = VARIABLE_LEVELS[start]
+    return table[min(max(int(lines_total), 0), len(table) - 1)]
+
+
 def _calc_level(start_level, lines_cleared_total, progression="fixed"):
-    start = max(1, min(15, int(start_level)))
+    start = _clamp_level(start_level)
     if progression == "variable":
-        remaining = int(lines_cleared_total)
-        level = start
-        while level < 15:
-            goal = 5 * level
-            if remaining < goal:
-                break
-            remaining -= goal
-            level += 1
-        return max(1, min(15, level))
-    return max(1, min(15, start + int(lines_cleared_total // 10)))
+        return _variable_level(start, lines_cleared_total)
+    return max(1, min(MAX_LEVEL, start + int(lines_cleared_total // 10)))
 
 
 def _lines_to_next_level(level, lines_total, progression="fixed", start_level=1):
-    if level >= 15:
+    if level >= MAX_LEVEL:
         return 0.0
     if progression == "variable":
-        remaining = float(lines_total)
-        lvl = max(1, min(15, int(start_level)))
-        while lvl < 15 and remaining >= 5 * lvl:
-            remaining -= 5 * lvl
-            lvl += 1
-        if lvl >= 15:
+        start = _clamp_level(start_level)
+        lvl = _variable_level(start, lines_total)
+        if lvl >= MAX_LEVEL:
             return 0.0
+        remaining = float(lines_total) - GOAL_THRESHOLDS[start][lvl - start]
         return max(0.0, float(5 * lvl - remaining))
-    start = max(1, min(15, int(start_level)))
+    start = _clamp_level(start_level)
     lines_into_level = float(lines_total) - float((level - start) * 10)
     return max(0.0, float(10 - lines_into_level))
 
 
 def _score_action(level, lines_cleared, tspin_type, b2b_active):
-    base = 0
-    qualifies_b2b = False
-    if tspin_type == "tspin":
-        if lines_cleared == 0:
-            base = 400 * level
-        elif lines_cleared == 1:
-            base = 800 * level
-            qualifies_b2b = True
-        elif lines_cleared == 2:
-            base = 1200 * level
-            qualifies_b2b = True
-        elif lines_cleared == 3:
-            base = 1600 * level
-            qualifies_b2b = True
-    elif tspin_type == "mini":
-        if lines_cleared == 0:
-            base = 100 * level
-        else:
-            base = 200 * level
-            qualifies_b2b = True
-    else:
-        if lines_cleared == 1:
-            base = 100 * level
-        elif lines_cleared == 2:
-            base = 300 * level
-        elif lines_cleared == 3:
-            base = 500 * level
-        elif lines_cleared == 4:
-            base = 800 * level
-            qualifies_b2b = True
-
-    bonus = 0
-    next_b2b = b2b_active
-    if qualifies_b2b:
-        if b2b_active:
-            bonus = int(base * 0.5)
-        next_b2b = True
-    elif lines_cleared in {1, 2, 3}:
-        next_b2b = False
-
-    return base + bonus, next_b2b
+    tspin_idx = _TSPIN_INDEX.get(tspin_type, 0)
+    active = 1 if b2b_active else 0
+    points = _SCORE_ROWS[tspin_idx][lines_cleared][active] * level
+    return points, _B2B_ROWS[tspin_idx][lines_cleared][active]
 
 
 def _awarded_goal_lines(lines_cleared, tspin_type, b2b_active):
-    base = 0.0
-    qualifies_b2b = False
-    if tspin_type == "tspin":
-        if lines_cleared == 0:
-            base = 4.0
-        elif lines_cleared == 1:
-            base = 8.0
-            qualifies_b2b = True
-        elif lines_cleared == 2:
-            base = 12.0
-            qualifies_b2b = True
-        elif lines_cleared == 3:
-            base = 16.0
-            qualifies_b2b = True
-    elif tspin_type == "mini":
-        if lines_cleared == 0:
-            base = 1.0
-        else:
-            base = 2.0
-            qualifies_b2b = True
-    else:
-        if lines_cleared == 1:
-            base = 1.0
-        elif lines_cleared == 2:
-            base = 3.0
-        elif lines_cleared == 3:
-            base = 5.0
-        elif lines_cleared == 4:
-            base = 8.0
-            qualifies_b2b = True
-    if qualifies_b2b and b2b_active and base > 0:
-        base += base * 0.5
-    return base
+    tspin_idx = _TSPIN_INDEX.get(tspin_type, 0)
+    return _GOAL_ROWS[tspin_idx][lines_cleared][1 if b2b_active else 0]
+
+
+def _score_action_batch(levels, lines_cleared, tspin_ids, b2b_active):
+    lines_cleared = np.asarray(lines_cleared)
+    tspin_ids = np.asarray(tspin_ids)
+    active = np.asarray(b2b_active).astype(np.int64)
+    points = SCORE_TABLE[tspin_ids, lines_cleared, active] * np.asarray(levels)
+    return points, B2B_TABLE[tspin_ids, lines_cleared, active]
+
+
+def _awarded_goal_lines_batch(lines_cleared, tspin_ids, b2b_active):
+    active = np.asarray(b2b_active).astype(np.int64)
+    return GOAL_TABLE[np.asarray(tspin_ids), np.asarray(lines_cleared), active]
+
+
+def _calc_level_batch(start_levels, lines_cleared_total, progression="fixed"):
+    starts = np.clip(np.asarray(start_levels).astype(np.int64), 1, MAX_LEVEL)
+    totals = np.asarray(lines_cleared_total)
+    if progression == "variable":
+        index = np.clip(totals.astype(np.int64), 0, _VARIABLE_LEVEL_ARRAY.shape[1] - 1)
+        return _VARIABLE_LEVEL_ARRAY[starts, index]
+    return np.clip(starts + (totals // 10).astype(np.int64), 1, MAX_LEVEL)
 
 
 def _update_stats(state, lines_cleared):
     if lines_cleared > 0:
-        state["combo_streak"] = state.get("combo_streak", 0) + 1
-        if state["combo_streak"] == 2:
-            state["combo_total"] = state.get("combo_total", 0) + 1
+        state.combo_streak += 1
+        if state.combo_streak == 2:
+            state.combo_total += 1
         if lines_cleared == 4:
-            state["tetrises"] = state.get("tetrises", 0) + 1
-        if state.get("tspin") != "none":
-            state["tspins"] = state.get("tspins", 0) + 1
+            state.tetrises += 1
+        if state.tspin != "none":
+            state.tspins += 1
     else:
-        state["combo_streak"] = 0
-
+        state.combo_streak = 0
@@ -0,0 +1,92 @@
+import random
+
+from ..constants import BOARD_HEIGHT, BOARD_WIDTH, SHAPES
+
+HASH_BITS = 64
+_MASK = (1 << HASH_BITS) - 1
+# Fixed seed: hashes are serialized, so keys must not change between runs.
+_KEY_SEED = 0x7E7215
+_SHAPE_INDEX = {shape: idx for idx, shape in enumerate(SHAPES)}
+
+
+def _build_keys():
+    rng = random.Random(_KEY_SEED)
+    cells = [
+        [{shape: rng.getrandbits(HASH_BITS) for shape in SHAPES} for _ in range(BOARD_WIDTH)]
+        for _ in range(BOARD_HEIGHT)
+    ]
+    hold = {shape: rng.getrandbits(HASH_BITS) for shape in SHAPES}
+    upcoming = {shape: rng.getrandbits(HASH_BITS) for shape in SHAPES}
+    return cells, hold, upcoming, rng.getrandbits(HASH_BITS), rng.getrandbits(HASH_BITS)
+
+
+_CELL_KEYS, _HOLD_KEYS, _NEXT_KEYS, _HOLD_USED_KEY, _QUEUE_SALT = _build_keys()
+
+
+def _mix64(value):
+    """splitmix64 finalizer, for terms too large to give a key table."""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK
+    return value ^ (value >> 31)
+
+
+def _changes_hash(changes, shape):
+    """Hash delta for ``(x, y, previous)`` cells overwritten with ``shape``."""
+    keys = _CELL_KEYS
+    value = 0
+    for x, y, previous in changes:
+        cell_keys = keys[y][x]
+        value ^= cell_keys[shape]
+        if previous:
+            value ^= cell_keys[previous]
+    return value
+
+
+def _rows_hash(board, top, bottom):
+    """Zobrist hash of the filled cells in rows ``top`` through ``bottom``."""
+    value = 0
+    for y in range(max(0, top), bottom + 1):
+        row = board[y]
+        if row.count(0) == len(row):
+            continue
+        for cell, keys in zip(row, _CELL_KEYS[y]):
+            if cell != 0:
+                value ^= keys[cell]
+    return value
+
+
+def _board_hash(board):
+    """Hash of every filled cell; raises on cells that are not shapes.
+
+    The board must already have ``BOARD_HEIGHT`` rows of ``BOARD_WIDTH``.
+    """
+    return _rows_hash(board, 0, BOARD_HEIGHT - 1)
+
+
+def _piece_key(piece):
+    shape, rot, x, y = piece
+    packed = ((_SHAPE_INDEX[shape] * 4 + rot % 4) << 32) | ((x & 0xFFFF) << 16) | (y & 0xFFFF)
+    return _mix64(packed)
+
+
+def _compose_hash(board_hash, piece, hold, hold_used, next_shape, seed, position):
+    """Fold the O(1) terms (piece, hold, queue position) into a board hash."""
+    value = board_hash ^ _piece_key(piece) ^ _NEXT_KEYS.get(next_shape, 0)
+    value ^= _HOLD_KEYS.get(hold, 0)
+    if hold_used:
+        value ^= _HOLD_USED_KEY
+    return value ^ _mix64(_mix64(_QUEUE_SALT ^ (seed & _MASK)) + position)
+
+
+def _state_hash(state):
+    """64-bit Zobrist hash of the board, piece, hold and queue position."""
+    return _compose_hash(
+        state.board_hash,
+        state.piece,
+        state.hold_piece_shape,
+        state.hold_used,
+        state.next_piece_shape,
+        state.seed,
+        state.sequence.position,
+    )
@@ -1,5 +1,6 @@
 from .assets.music_bootstrap import _ensure_js_music, _unpack_music_blob
 from .assets.textures import _load_texture_data, _load_texture_image, _texture_js_path
+from .cache import REGISTRY, BoundedCache, CacheRegistry, _cache_stats, _register_cache
 from .constants import (
     BOARD_HEIGHT,
     BOARD_WIDTH,
@@ -7,6 +8,8 @@ from .constants import (
     DEFAULT_BLOCK_STYLE,
     EXTRA_VISIBLE_ROWS,
     HIDDEN_ROWS,
+    MAX_OUTPUT_SCALE,
+    OUTPUT_PRECISIONS,
     OUTPUT_SCALE,
     PREVIEW_GRID,
     RANDOM_TEXTURE_IDS,
@@ -18,11 +21,23 @@ from .constants import (
     TEXTURE_SAMPLE_PX,
     VISIBLE_HEIGHT,
 )
-from .game.engine import _apply_action_step
+from .game.engine import _advance_time, _apply_action_step
+from .game.features import (
+    FeatureTracker,
+    _board_features,
+    _column_heights,
+    _occupancy,
+    _t_slot_map,
+    _t_slots,
+)
+from .game.finesse import FINESSE_ACTIONS, _finesse_path, _placements, _surface_profile
 from .game.pieces import (
     _clear_lines,
     _collides,
+    _column_top,
+    _column_tops,
     _corner_occupied,
+    _drop_distance,
     _ghost_piece,
     _kick_table,
     _lock_piece,
@@ -30,24 +45,48 @@ from .game.pieces import (
     _piece_cells,
     _rotate,
     _rotate_with_kick,
+    _row_fills,
+    _tspin_from_hits,
     _tspin_type,
     _tspin_type_from_corners,
 )
-from .game.rng import _empty_board, _new_bag, _pop_shape, _spawn_piece
+from .game.rng import (
+    PieceSequence,
+    _bag_order,
+    _empty_board,
+    _get_upcoming_shapes,
+    _new_bag,
+    _pop_shape,
+    _spawn_piece,
+)
 from .game.scoring import (
+    GRAVITY_MS,
     _awarded_goal_lines,
+    _awarded_goal_lines_batch,
     _calc_level,
+    _calc_level_batch,
+    _fall_seconds,
+    _gravity_ms,
     _lines_to_next_level,
     _score_action,
+    _score_action_batch,
     _update_stats,
 )
+from .game.zobrist import _board_hash, _state_hash
+from .render.block import BlockStylePlan, _block_sprite, _compile_block_style
 from .render.board import (
+    _board_base,
+    _capture_frame,
+    _draw_board,
     _prepare_background,
     _render,
+    _render_frame,
     _render_from_capture,
     _save_temp_background,
+    _save_temp_frame,
     _wrap_result,
 )
+from .render.capture import _capture_digest, _load_capture, _store_capture
 from .render.colors import (
     _adjust_color_by_factor,
     _adjust_color_hsl,
@@ -61,11 +100,46 @@ from .render.colors import (
     _resolve_options,
     _rgb_to_hsl,
 )
-from .render.preview import _get_upcoming_shapes, _render_next_piece, _render_queue
+from .render.export import (
+    _export_replay,
+    _palette_swatch,
+    _render_settings,
+    _replay_frames,
+    _replay_states,
+    _write_ffmpeg,
+    _write_gif,
+)
+from .render.multi import _render_boards, _score_label, _tile_frames
+from .render.preview import (
+    _build_preview_tile,
+    _preview_tile,
+    _render_next_piece,
+    _render_queue,
+    _render_side_outputs,
+    _render_stats,
+)
 from .render.style import _resolve_block_style, _scale_block_style, _texture_transform
-from .state.codec import _default_state, _deserialize_state, _valid_board, _valid_piece
+from .render.tensor import _resolve_precision, _to_image_tensor
+from .server import SessionStore, _make_app, _register_prompt_server_routes, _register_routes
+from .state.codec import (
+    _default_state,
+    _deserialize_state,
+    _deserialize_states,
+    _serialize_state,
+    _state_from_dict,
+    _state_seed,
+    _state_to_dict,
+    _valid_board,
+    _valid_piece,
+    _verified_board_hash,
+)
+from .state.schema import EngineState, Piece
+from .state.store import SessionDatabase, _session_db
+from .warmup import WARMUP, _start_warmup, _warmup_status
 
 _unpack_music_blob()
+_register_prompt_server_routes()
+_start_warmup()
 
 class TetriNode:
     OUTPUT_NODE = True
@@ -85,6 +159,7 @@ class TetriNode:
                         "soft_drop",
                         "hard_drop",
                         "hold",
+                        "advance_ms",
                         "new",
                     ],
                     {"default": "none"},
@@ -104,11 +179,36 @@ class TetriNode:
             },
             "optional": {
                 "background_image": ("IMAGE",),
+                "output_precision": (list(OUTPUT_PRECISIONS), {"default": "float32"}),
+                "output_scale": ("INT", {"default": OUTPUT_SCALE, "min": 1, "max": MAX_OUTPUT_SCALE}),
+                "session_id": (
+                    "STRING",
+                    {
+                        "default": "",
+                        "tooltip": "Persist this game on disk under this id; with an empty state it resumes from the stored game.",
+                    },
+                ),
+                "elapsed_ms": (
+                    "INT",
+                    {
+                        "default": 0,
+                        "min": 0,
+                        "max": 0x7FFFFFFF,
+                        "tooltip": "Milliseconds of gravity the advance_ms action lets pass at the current level's fall speed.",
+                    },
+                ),
+                "ui_preview": (
+                    "BOOLEAN",
+                    {
+                        "default": False,
+                        "tooltip": "Show the matrix frame on this node as a PNG written straight from the rendered bytes, instead of wiring a Preview Image node.",
+                    },
+                ),
             },
         }
 
-    RETURN_TYPES = ("IMAGE",)
-    RETURN_NAMES = ("matrix",)
+    RETURN_TYPES = ("IMAGE", "IMAGE", "IMAGE", "IMAGE")
+    RETURN_NAMES = ("matrix", "hold", "queue", "stats")
     FUNCTION = "step"
     CATEGORY = "games"
 
@@ -119,26 +219,45 @@ class TetriNode:
         seed,
         block_size,
         background_image=None,
+        output_precision="float32",
+        output_scale=OUTPUT_SCALE,
+        session_id="",
+        elapsed_ms=0,
+        ui_preview=False,
     ):
         state_override = state
+        precision = _resolve_precision(output_precision)
+        try:
+            output_scale = max(1, min(MAX_OUTPUT_SCALE, int(output_scale)))
+        except (TypeError, ValueError):
+            output_scale = OUTPUT_SCALE
+        session_id = (session_id or "").strip()
+        database = _session_db() if session_id else None
+        stored = None
+        if database is not None and action != "new" and not state_override:
+            stored = database.load(session_id)
+            if stored is not None and action != "sync" and stored.seed != seed:
+                # Another seed plays a fresh game without saving over the stored one.
+                stored = None
+                database = None
         if action == "new":
             state_obj = _default_state(seed)
+            if database is not None:
+                database.delete(session_id)
+        elif stored is not None:
+            state_obj = stored
         else:
             enforce_seed = action != "sync"
             state_obj = _deserialize_state(state_override, seed, enforce_seed=enforce_seed)
-        options = _resolve_options(state_obj.get("options", {}))
+            rejected = state_override and enforce_seed and _state_seed(state_override) != seed
+            if database is not None and rejected:
+                # A rejected state falls back to a fresh game, which must not
+                # be saved over the session.
+                database = None
+        options = _resolve_options(state_obj.options)
         palette = _resolve_colors(options)
         style = _resolve_block_style(options)
         capture = options.get("matrix_capture")
-        if action == "sync":
-            captured = _render_from_capture(capture)
-            if captured is not None:
-                return _wrap_result(
-                    (
-                        captured,
-                    ),
-                    background_image,
-                )
         ghost_enabled = _resolve_bool(options, "ghost_piece", True)
         grid_enabled = _resolve_bool(options, "grid_enabled", True)
         grid_default = "rgba(255,255,255,0.08)"
@@ -148,71 +267,107 @@ class TetriNode:
             queue_size = max(0, min(6, int(queue_size)))
         except (TypeError, ValueError):
             queue_size = 6
+        output_block = block_size * output_scale
+        render_style = _scale_block_style(style, output_scale)
 
         if action == "sync":
-            state_obj["seed"] = seed
-            output_block = block_size * OUTPUT_SCALE
-            render_style = _scale_block_style(style, OUTPUT_SCALE)
-            image = _render(
-                state_obj["board"],
-                state_obj["piece"],
+            state_obj.seed = seed
+        elif action == "advance_ms":
+            _advance_time(state_obj, elapsed_ms)
+        elif not state_obj.game_over:
+            _apply_action_step(state_obj, action)
+        if database is not None:
+            database.save(session_id, state_obj)
+
+        frame = _capture_frame(capture) if action == "sync" else None
+        if frame is None:
+            frame = _render_frame(
+                state_obj.board,
+                state_obj.piece,
                 output_block,
                 background_image,
                 palette,
                 ghost_enabled=ghost_enabled,
                 grid_color=grid_color,
                 style=render_style,
-                seed=state_obj.get("seed", seed),
+                seed=state_obj.seed,
+                column_tops=state_obj.column_tops,
             )
-            return _wrap_result(
-                (
-                    image,
+        return _wrap_result(
+            (
+                _to_image_tensor(frame, precision),
+                *_render_side_outputs(
+                    state_obj,
+                    output_block,
+                    palette,
+                    render_style,
+                    state_obj.seed,
+                    queue_size,
+                    precision,
                 ),
-                background_image,
-            )
+            ),
+            background_image,
+            frame if ui_preview else None,
+        )
 
-        if state_obj.get("game_over"):
-            output_block = block_size * OUTPUT_SCALE
-            render_style = _scale_block_style(style, OUTPUT_SCALE)
-            image = _render(
-                state_obj["board"],
-                state_obj["piece"],
-                output_block,
-                background_image,
-                palette,
-                ghost_enabled=ghost_enabled,
-                grid_color=grid_color,
-                style=render_style,
-                seed=state_obj.get("seed", seed),
-            )
-            return _wrap_result(
-                (
-                    image,
+
+class TetriNodeMultiBoard:
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "states": (
+                    "STRING",
+                    {
+                        "default": "",
+                        "multiline": True,
+                        "tooltip": "JSON list of saved states, or one saved state per line.",
+                    },
                 ),
-                background_image,
-            )
+                "block_size": ("INT", {"default": 20, "min": 8, "max": 48}),
+                "columns": ("INT", {"default": 0, "min": 0, "max": 16, "tooltip": "0 = auto"}),
+                "show_scores": ("BOOLEAN", {"default": True}),
+                "layout": (["tiled", "batch"], {"default": "tiled"}),
+            },
+            "optional": {
+                "background_image": ("IMAGE",),
+                "output_precision": (list(OUTPUT_PRECISIONS), {"default": "float32"}),
+                "output_scale": ("INT", {"default": 1, "min": 1, "max": MAX_OUTPUT_SCALE}),
+            },
+        }
 
-        _apply_action_step(state_obj, action)
-        board = state_obj["board"]
-        piece = state_obj["piece"]
-        next_shape = state_obj["next_piece_shape"]
+    RETURN_TYPES = ("IMAGE",)
+    RETURN_NAMES = ("boards",)
+    FUNCTION = "render"
+    CATEGORY = "games"
 
-        output_block = block_size * OUTPUT_SCALE
-        render_style = _scale_block_style(style, OUTPUT_SCALE)
-        image = _render(
-            board,
-            piece,
-            output_block,
-            background_image,
-            palette,
-            ghost_enabled=ghost_enabled,
-            grid_color=grid_color,
-            style=render_style,
-            seed=state_obj.get("seed", seed),
-        )
-        return _wrap_result(
-            (
-                image,
-            ),
+    def render(
+        self,
+        states,
+        block_size,
+        columns,
+        show_scores,
+        layout,
+        background_image=None,
+        output_precision="float32",
+        output_scale=1,
+    ):
+        games = _deserialize_states(states)
+        try:
+            output_scale = max(1, min(MAX_OUTPUT_SCALE, int(output_scale)))
+        except (TypeError, ValueError):
+            output_scale = 1
+        # Boards share one background/grid pass, so the first game's look
+        # (colors, block style, grid, ghost) applies to all of them.
+        settings = _render_settings(games[0].options if games else {}, output_scale)
+        image = _render_boards(
+            games,
+            block_size * output_scale,
             background_image,
+            columns=columns,
+            show_scores=show_scores,
+            batched=layout == "batch",
+            precision=_resolve_precision(output_precision),
+            **settings,
         )
+        return (image,)
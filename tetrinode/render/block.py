@@ -0,0 +1,576 @@
+import hashlib
+import math
+import random
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+from PIL import Image, ImageChops, ImageDraw, ImageFilter
+
+from ..assets.textures import _load_texture_image
+from ..cache import _register_cache, _register_lru_cache
+from ..constants import PIXELATED_TEXTURE_SAMPLE_RATIO, RANDOM_TEXTURE_IDS, TEXTURE_SAMPLE_PX
+from .colors import _adjust_color_by_factor, _adjust_color_hsl, _clamp, _mix_colors
+from .style import _texture_transform
+
+_SPRITE_CACHE = _register_cache("block_sprites")
+_FIELD_CACHE = _register_cache("block_fields")
+
+
+class BlockColors(NamedTuple):
+    base: tuple
+    gradient_start: tuple
+    gradient_end: tuple
+    specular: tuple
+    glow: tuple
+    border: tuple
+
+
+class BlockStylePlan:
+    """A resolved block style compiled down to its active render stages.
+
+    Plans are cached per style, so the branch checks and the derived
+    per-color parameters are paid once instead of once per drawn block.
+    """
+
+    __slots__ = (
+        "key",
+        "style",
+        "stages",
+        "keyed",
+        "corner_radius",
+        "fill_alpha",
+        "metallic_strength",
+        "metallic_boost",
+        "gradient_contrast",
+        "spec_strength",
+        "spec_size",
+        "_colors",
+    )
+
+    def __init__(self, key):
+        style = dict(key)
+        self.key = key
+        self.style = style
+        self.corner_radius = max(0.0, style["corner_radius"])
+        self.fill_alpha = int(round(_clamp(style["alpha"], 0, 1) * 255))
+        self.metallic_strength = min(1.0, style["metallic"])
+        self.metallic_boost = max(0.0, style["metallic"] - 1.0)
+        effective_gradient = style["gradient"] * (1 - style["roughness"] * 0.35)
+        self.gradient_contrast = (
+            effective_gradient * max(0.2, style["gradient_contrast"])
+            if effective_gradient > 0
+            else 0.0
+        )
+        self.spec_strength = style["specular_strength"] * (1 - style["roughness"])
+        self.spec_size = min(1.0, style["specular_size"] + style["roughness"] * 0.35)
+        texture_active = bool(style["texture_id"]) and style["texture_opacity"] > 0
+        checks = (
+            ("shadow", style["shadow"] > 0),
+            ("fill", True),
+            ("bevel", style["bevel"] > 0),
+            ("specular", self.spec_strength > 0 and self.spec_size > 0),
+            ("clearcoat", style["clearcoat"] > 0 and style["clearcoat_size"] > 0),
+            ("rim_light", style["rim_light"] > 0),
+            ("inner_shadow", style["inner_shadow"] > 0 and style["inner_shadow_strength"] > 0),
+            ("scanlines", style["scanlines"] > 0),
+            ("texture", texture_active),
+            ("glow", style["glow"] > 0 and style["glow_opacity"] > 0),
+            ("border", style["border"] > 0 and style["outline_opacity"] > 0),
+            ("noise", style["noise"] > 0),
+        )
+        self.stages = tuple(_STAGES[name] for name, active in checks if active)
+        # Random texture crops and noise depend on the per-cell texture key.
+        self.keyed = style["noise"] > 0 or (
+            texture_active and style["texture_id"] in RANDOM_TEXTURE_IDS
+        )
+        self._colors = {}
+
+    def colors(self, color):
+        resolved = self._colors.get(color)
+        if resolved is None:
+            # setdefault keeps one result if two threads resolve the same color.
+            resolved = self._colors.setdefault(color, self._resolve_colors(color))
+        return resolved
+
+    def _resolve_colors(self, color):
+        style = self.style
+        base_color = _adjust_color_hsl(color, style["saturation_shift"], style["brightness_shift"])
+        if style["metallic"] > 0:
+            base_color = _adjust_color_by_factor(
+                base_color,
+                -0.2 * self.metallic_strength - 0.2 * self.metallic_boost,
+            )
+        contrast = self.gradient_contrast
+        return BlockColors(
+            base=base_color,
+            gradient_start=_adjust_color_by_factor(base_color, contrast * 0.4),
+            gradient_end=_adjust_color_by_factor(base_color, -contrast * 0.4),
+            specular=_mix_colors(base_color, (255, 255, 255), 1 - self.metallic_strength),
+            glow=_adjust_color_by_factor(base_color, 0.25),
+            border=_adjust_color_by_factor(base_color, -0.4),
+        )
+
+
+def _style_key(style):
+    return tuple(sorted(style.items()))
+
+
+@_register_lru_cache("block_plans")
+@lru_cache(maxsize=64)
+def _compile_plan(key):
+    return BlockStylePlan(key)
+
+
+def _compile_block_style(style):
+    if isinstance(style, BlockStylePlan):
+        return style
+    return _compile_plan(_style_key(style))
+
+
+class _BlockGeometry(NamedTuple):
+    size: int
+    inner_size: int
+    draw_x: float
+    draw_y: float
+    rect_right: float
+    rect_bottom: float
+    mask: Image.Image
+    mask_inner: Image.Image
+
+
+def _block_geometry(plan, size):
+    shrink = 1 if plan.style["pixel_snap"] >= 0.5 else 0
+    inner_size = size - 1 - shrink
+    draw_x = shrink / 2
+    draw_y = shrink / 2
+    rect_right = draw_x + inner_size - 1
+    rect_bottom = draw_y + inner_size - 1
+    mask = Image.new("L", (size, size), 0)
+    mask_draw = ImageDraw.Draw(mask)
+    if plan.corner_radius > 0:
+        mask_draw.rounded_rectangle(
+            [draw_x, draw_y, rect_right, rect_bottom],
+            radius=min(plan.corner_radius, inner_size / 2),
+            fill=255,
+        )
+    else:
+        mask_draw.rectangle([draw_x, draw_y, rect_right, rect_bottom], fill=255)
+    mask_inner = mask.crop(
+        (int(draw_x), int(draw_y), int(draw_x) + inner_size, int(draw_y) + inner_size)
+    )
+    return _BlockGeometry(
+        size, inner_size, draw_x, draw_y, rect_right, rect_bottom, mask, mask_inner
+    )
+
+
+def _build_block_fields(plan, size):
+    geo = _block_geometry(plan, size)
+    fields = {"geo": geo}
+    for stage in plan.stages:
+        builder = _FIELD_BUILDERS.get(stage)
+        if builder is not None:
+            fields[stage] = builder(plan, geo)
+    return fields
+
+
+def _block_fields(plan, size):
+    """Color-independent layers for every active stage at one block size.
+
+    Lighting fields, masks and the blurred shadow/glow alpha only depend on
+    the style and the block size, so they are built once and shared by every
+    color and every cell instead of being recomputed per block. The layers
+    are shared across threads and must be treated as read-only.
+    """
+    return _FIELD_CACHE.get_or_create((plan.key, size), lambda: _build_block_fields(plan, size))
+
+
+def _shadow_field(plan, geo):
+    style = plan.style
+    size = geo.size
+    rad = math.radians(style["shadow_angle"] % 360)
+    offset = style["shadow"] * 4
+    shadow_alpha = int(round(min(0.6, 0.2 + style["shadow"] * 0.6) * 255))
+    shadow = Image.new("RGBA", (size, size), (0, 0, 0, shadow_alpha))
+    shadow.putalpha(geo.mask)
+    shadow = shadow.filter(ImageFilter.GaussianBlur(radius=style["shadow"] * 8))
+    shadow_layer = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    shadow_layer.paste(
+        shadow,
+        (int(round(math.cos(rad) * offset)), int(round(math.sin(rad) * offset))),
+        shadow,
+    )
+    return shadow_layer
+
+
+def _fill_field(plan, geo):
+    if plan.gradient_contrast <= 0:
+        return None
+    angle = math.radians(plan.style["gradient_angle"] % 360)
+    dx = math.cos(angle)
+    dy = math.sin(angle)
+    inner_size = geo.inner_size
+    half = inner_size / 2
+    xs, ys = np.meshgrid(np.arange(inner_size), np.arange(inner_size))
+    tx = (xs - half) * dx + (ys - half) * dy
+    return np.clip(tx / max(1.0, half) * 0.5 + 0.5, 0, 1)
+
+
+def _bevel_field(plan, geo):
+    style = plan.style
+    size = geo.size
+    inner_size = geo.inner_size
+    bevel = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    xs, ys = np.meshgrid(np.arange(inner_size), np.arange(inner_size))
+    t = np.clip((xs + ys) / max(1.0, inner_size * 2), 0, 1)
+    bevel_arr = np.zeros((inner_size, inner_size, 4), dtype=np.uint8)
+    bevel_arr[..., 0] = 255
+    bevel_arr[..., 1] = 255
+    bevel_arr[..., 2] = 255
+    bevel_arr[..., 3] = (style["bevel"] * 0.35 * (1 - t) * 255).astype(np.uint8)
+    bevel_img = Image.fromarray(bevel_arr, "RGBA")
+    bevel.paste(bevel_img, (int(geo.draw_x), int(geo.draw_y)), geo.mask_inner)
+    dark_arr = np.zeros((inner_size, inner_size, 4), dtype=np.uint8)
+    dark_arr[..., 3] = (style["bevel"] * 0.3 * t * 255).astype(np.uint8)
+    dark_img = Image.fromarray(dark_arr, "RGBA")
+    bevel.paste(dark_img, (int(geo.draw_x), int(geo.draw_y)), geo.mask_inner)
+    return bevel
+
+
+def _radial_alpha(geo, cx, cy, radius, strength):
+    size = geo.size
+    xs, ys = np.meshgrid(np.arange(size), np.arange(size))
+    dist = np.sqrt((xs - cx) ** 2 + (ys - cy) ** 2)
+    alpha = np.clip(1 - dist / max(1.0, radius), 0, 1) * strength
+    alpha_img = Image.fromarray((alpha * 255).astype(np.uint8), "L")
+    return ImageChops.multiply(alpha_img, geo.mask)
+
+
+def _specular_field(plan, geo):
+    radius = max(4, geo.inner_size * plan.spec_size)
+    cx = geo.draw_x + radius * 0.6
+    cy = geo.draw_y + radius * 0.6
+    return _radial_alpha(geo, cx, cy, radius, plan.spec_strength * 0.6)
+
+
+def _clearcoat_field(plan, geo):
+    style = plan.style
+    radius = max(3, geo.inner_size * style["clearcoat_size"] * 0.6)
+    cx = geo.draw_x + radius * 0.55
+    cy = geo.draw_y + radius * 0.5
+    coat = Image.new("RGBA", (geo.size, geo.size), (255, 255, 255, 0))
+    coat.putalpha(_radial_alpha(geo, cx, cy, radius, style["clearcoat"] * 0.7))
+    return coat
+
+
+def _rim_light_field(plan, geo):
+    # Deliberately reproduces the legacy Python renderer: the rim layer was
+    # flattened to RGB before screening, dropping its alpha, so rims come out
+    # near-white. The browser keeps the alpha, so this does NOT match the
+    # frontend, and the preset goldens are not a browser-parity reference.
+    return Image.new("RGB", (geo.size, geo.size), (255, 255, 255))
+
+
+def _inner_shadow_field(plan, geo):
+    style = plan.style
+    size = geo.size
+    inner = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(inner)
+    inset = style["inner_shadow"] / 2
+    width = max(1, int(round(style["inner_shadow"])))
+    alpha = int(round(style["inner_shadow_strength"] * 0.6 * 255))
+    inner_span = max(0, geo.inner_size - style["inner_shadow"])
+    left = geo.draw_x + inset
+    top = geo.draw_y + inset
+    right = left + inner_span - 1
+    bottom = top + inner_span - 1
+    draw.rectangle(
+        [left, top, right, bottom],
+        outline=(0, 0, 0, alpha),
+        width=width,
+    )
+    inner.putalpha(ImageChops.multiply(inner.split()[-1], geo.mask))
+    return inner
+
+
+def _scanlines_field(plan, geo):
+    style = plan.style
+    size = geo.size
+    inner_size = geo.inner_size
+    lines = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(lines)
+    step = max(2, int(inner_size / 6))
+    alpha = int(round(min(0.4, style["scanlines"] * 0.6) * 255))
+    for yy in range(int(geo.draw_y) + step, int(geo.draw_y + inner_size), step):
+        draw.line([geo.draw_x, yy, geo.draw_x + inner_size, yy], fill=(0, 0, 0, alpha), width=1)
+    lines.putalpha(ImageChops.multiply(lines.split()[-1], geo.mask))
+    return lines
+
+
+def _glow_field(plan, geo):
+    style = plan.style
+    size = geo.size
+    glow_alpha = int(round(_clamp(style["glow_opacity"], 0, 1) * 255))
+    glow_layer = Image.new("RGBA", (size, size), (0, 0, 0, glow_alpha))
+    glow_layer.putalpha(geo.mask)
+    glow_layer = glow_layer.filter(ImageFilter.GaussianBlur(radius=style["glow"] * 6))
+    return glow_layer.split()[-1]
+
+
+def _border_field(plan, geo):
+    style = plan.style
+    size = geo.size
+    inner_size = geo.inner_size
+    corner_radius = plan.corner_radius
+    draw_x, draw_y = geo.draw_x, geo.draw_y
+    rect_right, rect_bottom = geo.rect_right, geo.rect_bottom
+    outline_alpha = int(round(_clamp(style["outline_opacity"], 0, 1) * 255))
+    border = max(1.0, float(style["border"]))
+    outer_mask = Image.new("L", (size, size), 0)
+    outer_draw = ImageDraw.Draw(outer_mask)
+    outer_radius = min(corner_radius, inner_size / 2)
+    if outer_radius > 0:
+        outer_draw.rounded_rectangle(
+            [draw_x, draw_y, rect_right, rect_bottom],
+            radius=outer_radius,
+            fill=255,
+        )
+    else:
+        outer_draw.rectangle(
+            [draw_x, draw_y, rect_right, rect_bottom],
+            fill=255,
+        )
+    inner_mask = Image.new("L", (size, size), 0)
+    inner_draw = ImageDraw.Draw(inner_mask)
+    inset = border / 2.0
+    inner_left = draw_x + border
+    inner_top = draw_y + border
+    inner_right = rect_right - border
+    inner_bottom = rect_bottom - border
+    inner_radius = max(0.0, min(corner_radius - inset, inner_size / 2))
+    if inner_right > inner_left and inner_bottom > inner_top:
+        if inner_radius > 0:
+            inner_draw.rounded_rectangle(
+                [inner_left, inner_top, inner_right, inner_bottom],
+                radius=inner_radius,
+                fill=255,
+            )
+        else:
+            inner_draw.rectangle(
+                [inner_left, inner_top, inner_right, inner_bottom],
+                fill=255,
+            )
+    ring = ImageChops.subtract(outer_mask, inner_mask)
+    border_layer = Image.new("RGBA", (size, size), (0, 0, 0, outline_alpha))
+    border_layer.putalpha(ring)
+    if style["border_blur"] > 0:
+        border_layer = border_layer.filter(ImageFilter.GaussianBlur(radius=style["border_blur"]))
+    return border_layer.split()[-1]
+
+
+def _stage_shadow(block, plan, fields, colors, texture_key, seed):
+    return Image.alpha_composite(block, fields[_stage_shadow])
+
+
+def _stage_fill(block, plan, fields, colors, texture_key, seed):
+    geo = fields["geo"]
+    size = geo.size
+    inner_size = geo.inner_size
+    t = fields[_stage_fill]
+    if t is not None:
+        fill_layer = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+        c1 = colors.gradient_start
+        c2 = colors.gradient_end
+        grad = np.zeros((inner_size, inner_size, 4), dtype=np.uint8)
+        grad[..., 0] = (c1[0] + (c2[0] - c1[0]) * t).astype(np.uint8)
+        grad[..., 1] = (c1[1] + (c2[1] - c1[1]) * t).astype(np.uint8)
+        grad[..., 2] = (c1[2] + (c2[2] - c1[2]) * t).astype(np.uint8)
+        grad[..., 3] = plan.fill_alpha
+        gradient_img = Image.fromarray(grad, "RGBA")
+        fill_layer.paste(gradient_img, (int(geo.draw_x), int(geo.draw_y)), geo.mask_inner)
+    else:
+        fill_layer = Image.new("RGBA", (size, size), (*colors.base, plan.fill_alpha))
+        fill_layer.putalpha(geo.mask)
+    if plan.style["fill_blur"] > 0:
+        fill_layer = fill_layer.filter(ImageFilter.GaussianBlur(radius=plan.style["fill_blur"]))
+    return Image.alpha_composite(block, fill_layer)
+
+
+def _stage_bevel(block, plan, fields, colors, texture_key, seed):
+    return Image.alpha_composite(block, fields[_stage_bevel])
+
+
+def _stage_specular(block, plan, fields, colors, texture_key, seed):
+    size = fields["geo"].size
+    spec_img = Image.new("RGBA", (size, size), (*colors.specular, 0))
+    spec_img.putalpha(fields[_stage_specular])
+    return Image.alpha_composite(block, spec_img)
+
+
+def _stage_clearcoat(block, plan, fields, colors, texture_key, seed):
+    return Image.alpha_composite(block, fields[_stage_clearcoat])
+
+
+def _stage_rim_light(block, plan, fields, colors, texture_key, seed):
+    screened = ImageChops.screen(block.convert("RGB"), fields[_stage_rim_light])
+    return Image.merge("RGBA", (*screened.split(), block.split()[-1]))
+
+
+def _stage_inner_shadow(block, plan, fields, colors, texture_key, seed):
+    return Image.alpha_composite(block, fields[_stage_inner_shadow])
+
+
+def _stage_scanlines(block, plan, fields, colors, texture_key, seed):
+    return Image.alpha_composite(block, fields[_stage_scanlines])
+
+
+def _texture_layer(plan, geo, texture_key=None, seed=0):
+    style = plan.style
+    size = geo.size
+    inner_size = geo.inner_size
+    texture_id = style["texture_id"]
+    texture_img = _load_texture_image(texture_id)
+    if not texture_img:
+        return None
+    src_w = texture_img.width
+    src_h = texture_img.height
+    if texture_id in RANDOM_TEXTURE_IDS and texture_key:
+        transform = _texture_transform(seed, texture_key)
+        if texture_id == "pixelated":
+            ratio = PIXELATED_TEXTURE_SAMPLE_RATIO
+            src_w = max(1, int(round(texture_img.width * ratio)))
+            src_h = max(1, int(round(texture_img.height * ratio)))
+        else:
+            src_w = max(1, min(TEXTURE_SAMPLE_PX, texture_img.width))
+            src_h = max(1, min(TEXTURE_SAMPLE_PX, texture_img.height))
+        max_x = max(0, texture_img.width - src_w)
+        max_y = max(0, texture_img.height - src_h)
+        src_x = int(math.floor(max_x * transform["u"]))
+        src_y = int(math.floor(max_y * transform["v"]))
+        crop = texture_img.crop((src_x, src_y, src_x + src_w, src_y + src_h))
+        if transform["rotation"]:
+            crop = crop.rotate(transform["rotation"], expand=True)
+        if transform["flip_x"]:
+            crop = crop.transpose(Image.FLIP_LEFT_RIGHT)
+        if transform["flip_y"]:
+            crop = crop.transpose(Image.FLIP_TOP_BOTTOM)
+    else:
+        crop = texture_img
+    scale_base = max(inner_size / crop.width, inner_size / crop.height)
+    draw_w = max(1, int(round(crop.width * scale_base * style["texture_scale"])))
+    draw_h = max(1, int(round(crop.height * scale_base * style["texture_scale"])))
+    texture_layer = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    resized = crop.resize((draw_w, draw_h), Image.BICUBIC)
+    angle = style["texture_angle"]
+    if angle:
+        resized = resized.rotate(angle, expand=True)
+    tx = int(round((size - resized.width) / 2))
+    ty = int(round((size - resized.height) / 2))
+    texture_layer.paste(resized, (tx, ty), resized)
+    if plan.corner_radius > 0:
+        texture_layer.putalpha(ImageChops.multiply(texture_layer.split()[-1], geo.mask))
+    return texture_layer.convert("RGB"), texture_layer.split()[-1]
+
+
+def _texture_field(plan, geo):
+    return _texture_layer(plan, geo)
+
+
+def _stage_texture(block, plan, fields, colors, texture_key, seed):
+    if texture_key and plan.style["texture_id"] in RANDOM_TEXTURE_IDS:
+        layer = _texture_layer(plan, fields["geo"], texture_key, seed)
+    else:
+        layer = fields[_stage_texture]
+    if layer is None:
+        return block
+    tex_rgb, tex_alpha = layer
+    base_rgb = block.convert("RGB")
+    multiplied = ImageChops.multiply(base_rgb, tex_rgb)
+    blended = Image.blend(base_rgb, multiplied, _clamp(plan.style["texture_opacity"], 0, 1))
+    composited = Image.composite(blended, base_rgb, tex_alpha)
+    return Image.merge("RGBA", (*composited.split(), block.split()[-1]))
+
+
+def _stage_glow(block, plan, fields, colors, texture_key, seed):
+    size = fields["geo"].size
+    glow_rgb = Image.new("RGB", (size, size), (0, 0, 0))
+    glow_rgb.paste(colors.glow, mask=fields[_stage_glow])
+    added = ImageChops.add(block.convert("RGB"), glow_rgb, scale=1.0, offset=0)
+    return Image.merge("RGBA", (*added.split(), block.split()[-1]))
+
+
+def _stage_border(block, plan, fields, colors, texture_key, seed):
+    size = fields["geo"].size
+    border_layer = Image.new("RGBA", (size, size), (*colors.border, 0))
+    border_layer.putalpha(fields[_stage_border])
+    return Image.alpha_composite(block, border_layer)
+
+
+def _stage_noise(block, plan, fields, colors, texture_key, seed):
+    geo = fields["geo"]
+    style = plan.style
+    size = geo.size
+    inner_size = geo.inner_size
+    noise_key = f"{seed}:{texture_key or ''}:noise"
+    rng = random.Random(hashlib.md5(noise_key.encode("utf-8")).digest())
+    count = max(4, int(math.ceil(40 * style["noise"])))
+    noise_layer = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(noise_layer)
+    alpha_white = int(round(min(1, 0.3 + style["noise"] * 0.7) * 255))
+    alpha_black = int(round(min(1, style["noise"] * 0.5) * 255))
+    for _ in range(count):
+        nx = geo.draw_x + rng.random() * inner_size
+        ny = geo.draw_y + rng.random() * inner_size
+        draw.rectangle([nx, ny, nx + 1, ny + 1], fill=(255, 255, 255, alpha_white))
+    for _ in range(max(1, count // 2)):
+        nx = geo.draw_x + rng.random() * inner_size
+        ny = geo.draw_y + rng.random() * inner_size
+        draw.rectangle([nx, ny, nx + 1, ny + 1], fill=(0, 0, 0, alpha_black))
+    noise_layer.putalpha(ImageChops.multiply(noise_layer.split()[-1], geo.mask))
+    return Image.alpha_composite(block, noise_layer)
+
+
+_STAGES = {
+    "shadow": _stage_shadow,
+    "fill": _stage_fill,
+    "bevel": _stage_bevel,
+    "specular": _stage_specular,
+    "clearcoat": _stage_clearcoat,
+    "rim_light": _stage_rim_light,
+    "inner_shadow": _stage_inner_shadow,
+    "scanlines": _stage_scanlines,
+    "texture": _stage_texture,
+    "glow": _stage_glow,
+    "border": _stage_border,
+    "noise": _stage_noise,
+}
+_FIELD_BUILDERS = {
+    _stage_shadow: _shadow_field,
+    _stage_fill: _fill_field,
+    _stage_bevel: _bevel_field,
+    _stage_specular: _specular_field,
+    _stage_clearcoat: _clearcoat_field,
+    _stage_rim_light: _rim_light_field,
+    _stage_inner_shadow: _inner_shadow_field,
+    _stage_scanlines: _scanlines_field,
+    _stage_texture: _texture_field,
+    _stage_glow: _glow_field,
+    _stage_border: _border_field,
+}
+
+
+def _build_block_sprite(plan, size, color, texture_key=None, seed=0):
+    fields = _block_fields(plan, size)
+    colors = plan.colors(color)
+    block = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    for stage in plan.stages:
+        block = stage(block, plan, fields, colors, texture_key, seed)
+    return block
+
+
+def _block_sprite(plan, size, color, texture_key=None, seed=0):
+    if plan.keyed:
+        return _build_block_sprite(plan, size, color, texture_key, seed)
+    return _SPRITE_CACHE.get_or_create(
+        (plan.key, size, color), lambda: _build_block_sprite(plan, size, color)
+    )
@@ -0,0 +1,134 @@
+import base64
+import hashlib
+import io
+import os
+import re
+import threading
+
+import folder_paths
+import numpy as np
+from PIL import Image
+
+from ..cache import _register_cache
+
+CAPTURE_PREFIX = "sha256:"
+MAX_CAPTURE_BYTES = 16 * 1024 * 1024
+MAX_DECODED_CAPTURES = 16
+# Stored PNGs are evicted least recently referenced first past either cap.
+MAX_STORED_CAPTURES = 256
+MAX_STORED_CAPTURE_BYTES = 256 * 1024 * 1024
+_DIGEST = re.compile(r"[0-9a-f]{64}")
+_CAPTURE_CACHE = _register_cache("captures", max_entries=MAX_DECODED_CAPTURES)
+_PRUNE_LOCK = threading.Lock()
+
+
+def _capture_dir():
+    return os.path.join(folder_paths.get_temp_directory(), "tetrinode", "captures")
+
+
+def _capture_digest(ref):
+    """The hex digest of a ``sha256:<hex>`` capture reference, or None."""
+    if isinstance(ref, dict):
+        ref = ref.get("hash")
+    if not isinstance(ref, str) or not ref.startswith(CAPTURE_PREFIX):
+        return None
+    digest = ref[len(CAPTURE_PREFIX) :]
+    return digest if _DIGEST.fullmatch(digest) else None
+
+
+def _decode_data_url(raw):
+    if raw.startswith("data:"):
+        _, raw = raw.split(",", 1)
+    return base64.b64decode(raw)
+
+
+def _touch(path):
+    try:
+        os.utime(path)
+    except OSError:
+        return False
+    return True
+
+
+def _prune_captures(directory, keep):
+    """Evict the least recently referenced captures past the count/byte caps."""
+    with _PRUNE_LOCK:
+        try:
+            entries = [entry for entry in os.scandir(directory) if entry.name.endswith(".png")]
+        except OSError:
+            return
+        stats = []
+        for entry in entries:
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            stats.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        stats.sort(reverse=True)
+        total = 0
+        for index, (_, size, path) in enumerate(stats):
+            total += size
+            if path == keep or (index < MAX_STORED_CAPTURES and total <= MAX_STORED_CAPTURE_BYTES):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _store_capture(payload):
+    """Write PNG bytes under their content hash and return the reference.
+
+    Identical captures map to the same file, so re-uploading a frame that is
+    already stored costs a hash and nothing else. Storing or loading a capture
+    marks it as recently referenced; past ``MAX_STORED_CAPTURES`` files or
+    ``MAX_STORED_CAPTURE_BYTES`` the oldest are deleted, and a state that still
+    names an evicted capture renders from its board instead.
+    """
+    if len(payload) > MAX_CAPTURE_BYTES:
+        raise ValueError("capture is too large")
+    try:
+        with Image.open(io.BytesIO(payload)) as image:
+            fmt = image.format
+            image.verify()
+    except (OSError, SyntaxError):
+        fmt = None
+    if fmt != "PNG":
+        raise ValueError("capture must be a PNG")
+    digest = hashlib.sha256(payload).hexdigest()
+    directory = _capture_dir()
+    path = os.path.join(directory, f"{digest}.png")
+    if not _touch(path):
+        os.makedirs(directory, exist_ok=True)
+        partial = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(partial, "wb") as handle:
+            handle.write(payload)
+        os.replace(partial, path)
+        _prune_captures(directory, path)
+    return CAPTURE_PREFIX + digest
+
+
+def _read_capture(digest):
+    path = os.path.join(_capture_dir(), f"{digest}.png")
+    try:
+        with Image.open(path) as image:
+            pixels = np.array(image.convert("RGB"))
+    except (OSError, ValueError):
+        return None
+    pixels.setflags(write=False)
+    return pixels
+
+
+def _load_capture(ref):
+    """Decoded RGB pixels for a capture reference, or None if it is not stored."""
+    digest = _capture_digest(ref)
+    if digest is None:
+        return None
+    _touch(os.path.join(_capture_dir(), f"{digest}.png"))
+    pixels = _CAPTURE_CACHE.get(digest)
+    if pixels is None:
+        # Misses are not cached: the upload may land after the first lookup.
+        pixels = _read_capture(digest)
+        if pixels is not None:
+            _CAPTURE_CACHE.set(digest, pixels)
+    return pixels
@@ -1,6 +1,8 @@
 import json
 import re
+from functools import lru_cache
 
+from ..cache import _register_lru_cache
 from ..constants import COLORS
 
 def _parse_hex_color(value):
@@ -34,21 +36,33 @@ def _resolve_options(options_payload):
     return payload
 
 
+_COLOR_OPTION_KEYS = {
+    "color_i": "I",
+    "color_j": "J",
+    "color_l": "L",
+    "color_o": "O",
+    "color_s": "S",
+    "color_t": "T",
+    "color_z": "Z",
+    "background_color": "X",
+}
+
+
 def _resolve_colors(options_payload):
-    colors = dict(COLORS)
     payload = _resolve_options(options_payload)
-    mapping = {
-        "color_i": "I",
-        "color_j": "J",
-        "color_l": "L",
-        "color_o": "O",
-        "color_s": "S",
-        "color_t": "T",
-        "color_z": "Z",
-        "background_color": "X",
-    }
-    for key, shape in mapping.items():
-        parsed = _parse_hex_color(payload.get(key))
+    values = tuple(
+        value if isinstance(value, str) else None
+        for value in (payload.get(key) for key in _COLOR_OPTION_KEYS)
+    )
+    return dict(_resolve_colors_cached(values))
+
+
+@_register_lru_cache("resolved_colors")
+@lru_cache(maxsize=64)
+def _resolve_colors_cached(values):
+    colors = dict(COLORS)
+    for shape, value in zip(_COLOR_OPTION_KEYS.values(), values):
+        parsed = _parse_hex_color(value)
         if parsed:
             colors[shape] = parsed
     return colors
@@ -0,0 +1,176 @@
+import os
+import shutil
+import subprocess
+from itertools import chain
+
+import numpy as np
+from PIL import GifImagePlugin, Image
+
+from ..constants import BOARD_HEIGHT, BOARD_WIDTH, HIDDEN_ROWS, OUTPUT_SCALE, SHAPES
+from ..game.engine import _apply_action_step
+from ..state.codec import _default_state, _deserialize_state
+from .board import _render_frame, _render_settings
+
+GIF_EXTENSIONS = {".gif"}
+FFMPEG_CODECS = {
+    ".mp4": ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2"],
+    ".mov": ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2"],
+    ".mkv": ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2"],
+    ".webm": ["-c:v", "libvpx-vp9", "-pix_fmt", "yuv420p"],
+    ".webp": ["-c:v", "libwebp", "-loop", "0", "-lossless", "1"],
+}
+
+
+def _replay_states(seed, actions, state=None):
+    """Yield the engine state before the first action and after every action.
+
+    The same state object is advanced in place and yielded each time, so
+    consumers must render or copy it before pulling the next one.
+    """
+    state_obj = _deserialize_state(state, seed) if state else _default_state(seed)
+    yield state_obj
+    for action in actions:
+        if action == "new":
+            state_obj = _default_state(seed)
+        elif action != "sync" and not state_obj.game_over:
+            _apply_action_step(state_obj, action)
+        yield state_obj
+
+
+def _render_state_frame(state_obj, block_size, background_image=None, **settings):
+    return _render_frame(
+        state_obj.board,
+        state_obj.piece,
+        block_size,
+        background_image,
+        seed=state_obj.seed,
+        column_tops=state_obj.column_tops,
+        **settings,
+    )
+
+
+def _replay_frames(states, block_size=20, output_scale=OUTPUT_SCALE, background_image=None):
+    settings = None
+    for state_obj in states:
+        if settings is None:
+            settings = _render_settings(state_obj.options, output_scale)
+        yield _render_state_frame(
+            state_obj, block_size * output_scale, background_image, **settings
+        )
+
+
+def _palette_swatch(frame, state_obj, block_size, output_scale):
+    """Stack the first frame with a board holding every piece color in the
+    current style, so the fixed GIF palette covers pieces not yet seen."""
+    settings = _render_settings(state_obj.options, output_scale)
+    settings["ghost_enabled"] = False
+    shapes = list(SHAPES)
+    board = [[0] * BOARD_WIDTH for _ in range(BOARD_HEIGHT)]
+    for y in range(HIDDEN_ROWS, BOARD_HEIGHT, 2):
+        board[y] = [shapes[(y // 2) % len(shapes)]] * BOARD_WIDTH
+    swatch = _render_frame(
+        board,
+        state_obj.piece,
+        block_size * output_scale,
+        seed=state_obj.seed,
+        **settings,
+    )
+    return np.concatenate([frame, swatch])
+
+
+def _write_gif(frames, path, fps, palette_source):
+    """Stream frames into a GIF one at a time against a single fixed palette."""
+    duration = max(20, int(round(1000 / fps)))
+    palette_image = None
+    with open(path, "wb") as fp:
+        for frame in frames:
+            if palette_image is None:
+                palette_image = Image.fromarray(palette_source(frame)).quantize(
+                    256, method=Image.Quantize.MEDIANCUT
+                )
+            indexed = Image.fromarray(frame).quantize(
+                palette=palette_image, dither=Image.Dither.NONE
+            )
+            if fp.tell() == 0:
+                header, _ = GifImagePlugin.getheader(indexed, info={"loop": 0})
+                fp.writelines(header)
+            fp.writelines(GifImagePlugin.getdata(indexed, duration=duration))
+        fp.write(b";")
+
+
+def _write_ffmpeg(frames, path, fps, ffmpeg, codec_args):
+    proc = None
+    try:
+        for frame in frames:
+            if proc is None:
+                height, width = frame.shape[:2]
+                proc = subprocess.Popen(
+                    [
+                        ffmpeg,
+                        "-y",
+                        "-loglevel",
+                        "error",
+                        "-f",
+                        "rawvideo",
+                        "-pix_fmt",
+                        "rgb24",
+                        "-s",
+                        f"{width}x{height}",
+                        "-r",
+                        str(fps),
+                        "-i",
+                        "-",
+                        *codec_args,
+                        path,
+                    ],
+                    stdin=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                )
+            proc.stdin.write(frame.tobytes())
+    except BrokenPipeError:
+        pass
+    finally:
+        if proc is not None:
+            proc.stdin.close()
+            error = proc.stderr.read()
+            proc.stderr.close()
+            if proc.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed: {error.decode(errors='replace').strip()}")
+
+
+def _export_replay(
+    path,
+    seed,
+    actions,
+    state=None,
+    block_size=20,
+    output_scale=OUTPUT_SCALE,
+    fps=30,
+    background_image=None,
+):
+    """Render a replay straight into a media file without holding its frames.
+
+    GIF is encoded in-process with a fixed palette; video formats and
+    animated WebP are piped as raw RGB frames into ffmpeg.
+    """
+    path = os.fspath(path)
+    ext = os.path.splitext(path)[1].lower()
+    states = _replay_states(seed, actions, state)
+    if ext in GIF_EXTENSIONS:
+        first = next(states)
+
+        def palette_source(frame):
+            return _palette_swatch(frame, first, block_size, output_scale)
+
+        frames = _replay_frames(chain([first], states), block_size, output_scale, background_image)
+        _write_gif(frames, path, fps, palette_source)
+        return path
+    codec_args = FFMPEG_CODECS.get(ext)
+    if codec_args is None:
+        raise ValueError(f"Unsupported replay format: {ext or path}")
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError(f"ffmpeg is required to export {ext} replays; use .gif instead")
+    frames = _replay_frames(states, block_size, output_scale, background_image)
+    _write_ffmpeg(frames, path, fps, ffmpeg, codec_args)
+    return path
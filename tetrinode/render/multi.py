@@ -0,0 +1,85 @@
+import math
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from ..constants import COLORS, DEFAULT_BLOCK_STYLE
+from .block import _compile_block_style
+from .board import _board_base, _draw_board
+from .preview import STATS_TEXT_COLOR, _stats_font
+from .tensor import _to_image_tensor
+
+
+def _score_label(text, width, block_size, background):
+    # Drawn per frame: scores are nearly unique, so a label cache never hits.
+    img = Image.new("RGB", (width, block_size), background)
+    draw = ImageDraw.Draw(img)
+    font = _stats_font(max(8, int(block_size * 0.7)))
+    draw.text((block_size // 2, block_size // 8), text, fill=STATS_TEXT_COLOR, font=font)
+    return np.array(img)
+
+
+def _tile_frames(frames, columns, gap, background):
+    count = len(frames)
+    columns = max(1, min(columns or math.ceil(math.sqrt(count)), count))
+    rows = math.ceil(count / columns)
+    tile_h, tile_w = frames[0].shape[:2]
+    canvas = np.empty(
+        (rows * tile_h + (rows - 1) * gap, columns * tile_w + (columns - 1) * gap, 3),
+        dtype=np.uint8,
+    )
+    canvas[:] = background
+    for idx, frame in enumerate(frames):
+        row, col = divmod(idx, columns)
+        y0 = row * (tile_h + gap)
+        x0 = col * (tile_w + gap)
+        canvas[y0 : y0 + tile_h, x0 : x0 + tile_w] = frame
+    return canvas
+
+
+def _render_boards(
+    states,
+    block_size,
+    background_image=None,
+    colors=None,
+    ghost_enabled=False,
+    grid_color=None,
+    style=None,
+    columns=0,
+    show_scores=False,
+    batched=False,
+    precision="float32",
+):
+    """Render K games into one tiled IMAGE, or a (K, H, W, 3) batch.
+
+    The background and grid are drawn once and copied per board, and every
+    board shares the compiled style's sprite caches.
+    """
+    palette = colors or COLORS
+    plan = _compile_block_style(style or DEFAULT_BLOCK_STYLE)
+    base = _board_base(block_size, palette, grid_color, background_image)
+    frames = []
+    for idx, state in enumerate(states):
+        img = _draw_board(
+            base.copy(),
+            state.board,
+            state.piece,
+            block_size,
+            palette,
+            plan,
+            ghost_enabled,
+            state.seed,
+            state.column_tops,
+        )
+        frame = np.array(img.convert("RGB"))
+        if show_scores:
+            text = f"#{idx + 1}  {state.score}" + ("  GAME OVER" if state.game_over else "")
+            label = _score_label(text, frame.shape[1], block_size, palette["X"])
+            frame = np.concatenate([frame, label])
+        frames.append(frame)
+    if not frames:
+        frames.append(np.array(base.convert("RGB")))
+    if batched:
+        return _to_image_tensor(np.stack(frames), precision)
+    gap = max(1, block_size // 2)
+    return _to_image_tensor(_tile_frames(frames, columns, gap, palette["X"]), precision)
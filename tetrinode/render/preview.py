@@ -1,17 +1,22 @@
+from functools import lru_cache
+
 import numpy as np
-import torch
-from PIL import Image, ImageDraw
+from PIL import Image, ImageDraw, ImageFont
 
-from ..constants import COLORS, PREVIEW_GRID, SHAPES
-from ..game.rng import _new_bag
+from ..cache import _register_cache, _register_lru_cache
+from ..constants import COLORS, DEFAULT_BLOCK_STYLE, PREVIEW_GRID, SHAPES
+from ..game.rng import _get_upcoming_shapes
+from .block import _block_sprite, _compile_block_style
+from .tensor import _to_image_tensor
+
+STATS_TEXT_COLOR = (230, 232, 240)
+STATS_COLUMNS = 8
+
+_TILE_CACHE = _register_cache("preview_tiles")
+_STATS_BASE_CACHE = _register_cache("stats_panels")
 
-def _render_next_piece(shape, block_size, colors=None):
-    palette = colors or COLORS
-    grid = PREVIEW_GRID
-    size = grid * block_size
-    img = Image.new("RGB", (size, size), palette["X"])
-    draw = ImageDraw.Draw(img)
 
+def _shape_offsets(shape):
     cells = SHAPES[shape][0]
     min_x = min(x for x, _ in cells)
     min_y = min(y for _, y in cells)
@@ -19,69 +24,125 @@ def _render_next_piece(shape, block_size, colors=None):
     max_y = max(y for _, y in cells)
     shape_w = max_x - min_x + 1
     shape_h = max_y - min_y + 1
-    offset_x = (grid - shape_w) // 2 - min_x
-    offset_y = (grid - shape_h) // 2 - min_y
-
-    for x, y in cells:
-        gx = x + offset_x
-        gy = y + offset_y
-        if 0 <= gx < grid and 0 <= gy < grid:
-            x0 = gx * block_size
-            y0 = gy * block_size
-            draw.rectangle([x0, y0, x0 + block_size - 2, y0 + block_size - 2], fill=palette[shape])
-
-    arr = np.array(img).astype(np.float32) / 255.0
-    return torch.from_numpy(arr)[None, ...]
-
-
-def _get_upcoming_shapes(state, count):
-    if count <= 0:
-        return []
-    upcoming = [state.get("next_piece_shape")] + list(state.get("bag", []))
-    bag_count = state.get("bag_count", 0)
-    seed = state.get("seed", 0)
-    while len(upcoming) < count:
-        bag = _new_bag(seed, bag_count)
-        bag_count += 1
-        upcoming.extend(bag)
-    return upcoming[:count]
-
-
-def _render_queue(shapes, block_size, colors=None):
+    return (PREVIEW_GRID - shape_w) // 2 - min_x, (PREVIEW_GRID - shape_h) // 2 - min_y
+
+
+def _build_preview_tile(shape, block_size, palette, plan, seed):
+    size = PREVIEW_GRID * block_size
+    img = Image.new("RGBA", (size, size), (*palette["X"], 255))
+    if shape in SHAPES:
+        offset_x, offset_y = _shape_offsets(shape)
+        for idx, (x, y) in enumerate(SHAPES[shape][0]):
+            gx = x + offset_x
+            gy = y + offset_y
+            if 0 <= gx < PREVIEW_GRID and 0 <= gy < PREVIEW_GRID:
+                key = f"preview:{shape}:{idx}"
+                block = _block_sprite(plan, block_size, palette[shape], key, seed)
+                img.paste(block, (gx * block_size, gy * block_size), block)
+    tile = np.array(img.convert("RGB"))
+    tile.flags.writeable = False
+    return tile
+
+
+def _preview_tile(shape, block_size, palette, plan, seed=0):
+    color = palette.get(shape)
+    cache_key = (shape, block_size, color, palette["X"], plan.key, seed if plan.keyed else 0)
+    return _TILE_CACHE.get_or_create(
+        cache_key, lambda: _build_preview_tile(shape, block_size, palette, plan, seed)
+    )
+
+
+def _render_next_piece(shape, block_size, colors=None, precision="float32", style=None, seed=0):
     palette = colors or COLORS
+    plan = _compile_block_style(style or DEFAULT_BLOCK_STYLE)
+    tile = _preview_tile(shape, block_size, palette, plan, seed)
+    return _to_image_tensor(tile.copy(), precision)
+
+
+def _render_queue(shapes, block_size, colors=None, precision="float32", style=None, seed=0):
+    palette = colors or COLORS
+    plan = _compile_block_style(style or DEFAULT_BLOCK_STYLE)
     if not shapes:
-        size = PREVIEW_GRID * block_size
-        img = Image.new("RGB", (size, size), palette["X"])
-        arr = np.array(img).astype(np.float32) / 255.0
-        return torch.from_numpy(arr)[None, ...]
-    gap = block_size
+        return _to_image_tensor(_preview_tile(None, block_size, palette, plan).copy(), precision)
     width = PREVIEW_GRID * block_size
-    height = len(shapes) * PREVIEW_GRID * block_size + max(0, len(shapes) - 1) * gap
-    img = Image.new("RGB", (width, height), palette["X"])
-    draw = ImageDraw.Draw(img)
+    gap = np.empty((block_size, width, 3), dtype=np.uint8)
+    gap[:] = palette["X"]
+    parts = []
     for idx, shape in enumerate(shapes):
-        if shape not in SHAPES:
-            continue
-        offset_y = idx * (PREVIEW_GRID * block_size + gap)
-        cells = SHAPES[shape][0]
-        min_x = min(x for x, _ in cells)
-        min_y = min(y for _, y in cells)
-        max_x = max(x for x, _ in cells)
-        max_y = max(y for _, y in cells)
-        shape_w = max_x - min_x + 1
-        shape_h = max_y - min_y + 1
-        offset_x = (PREVIEW_GRID - shape_w) // 2 - min_x
-        offset_cell_y = (PREVIEW_GRID - shape_h) // 2 - min_y
-        for x, y in cells:
-            gx = x + offset_x
-            gy = y + offset_cell_y
-            if 0 <= gx < PREVIEW_GRID and 0 <= gy < PREVIEW_GRID:
-                x0 = gx * block_size
-                y0 = offset_y + gy * block_size
-                draw.rectangle(
-                    [x0, y0, x0 + block_size - 2, y0 + block_size - 2],
-                    fill=palette[shape],
-                )
-    arr = np.array(img).astype(np.float32) / 255.0
-    return torch.from_numpy(arr)[None, ...]
+        if idx:
+            parts.append(gap)
+        parts.append(_preview_tile(shape, block_size, palette, plan, seed))
+    return _to_image_tensor(np.concatenate(parts), precision)
+
+
+def _stats_lines(state):
+    return (
+        ("SCORE", state.score),
+        ("LEVEL", state.level),
+        ("LINES", state.lines_cleared_total),
+        ("TETRISES", state.tetrises),
+        ("T-SPINS", state.tspins),
+        ("COMBO", state.combo_streak),
+        ("B2B", "ON" if state.b2b_active else "OFF"),
+    )
+
+
+@_register_lru_cache("stats_fonts")
+@lru_cache(maxsize=8)
+def _stats_font(size):
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+def _build_stats_base(labels, block_size, background):
+    width = STATS_COLUMNS * block_size
+    height = (len(labels) + 1) * block_size
+    img = Image.new("RGB", (width, height), background)
+    draw = ImageDraw.Draw(img)
+    font = _stats_font(max(8, int(block_size * 0.7)))
+    pad = block_size // 2
+    for row, label in enumerate(labels):
+        draw.text((pad, pad + row * block_size), label, fill=STATS_TEXT_COLOR, font=font)
+    base = np.array(img)
+    base.flags.writeable = False
+    return base
+
+
+def _stats_base(labels, block_size, background):
+    """The panel background with its labels; the values change every step."""
+    return _STATS_BASE_CACHE.get_or_create(
+        (labels, block_size, background),
+        lambda: _build_stats_base(labels, block_size, background),
+    )
+
+
+def _build_stats_panel(lines, block_size, background):
+    labels = tuple(label for label, _ in lines)
+    img = Image.fromarray(_stats_base(labels, block_size, background).copy(), "RGB")
+    draw = ImageDraw.Draw(img)
+    font = _stats_font(max(8, int(block_size * 0.7)))
+    pad = block_size // 2
+    for row, (_, value) in enumerate(lines):
+        text = str(value)
+        x = img.width - pad - draw.textlength(text, font=font)
+        draw.text((x, pad + row * block_size), text, fill=STATS_TEXT_COLOR, font=font)
+    return np.array(img)
+
+
+def _render_stats(state, block_size, colors=None, precision="float32"):
+    palette = colors or COLORS
+    panel = _build_stats_panel(_stats_lines(state), block_size, palette["X"])
+    return _to_image_tensor(panel, precision)
+
 
+def _render_side_outputs(
+    state, block_size, colors=None, style=None, seed=0, queue_size=6, precision="float32"
+):
+    hold = _render_next_piece(state.hold_piece_shape, block_size, colors, precision, style, seed)
+    queue = _render_queue(
+        _get_upcoming_shapes(state, queue_size), block_size, colors, precision, style, seed
+    )
+    stats = _render_stats(state, block_size, colors, precision)
+    return hold, queue, stats
@@ -1,15 +1,33 @@
 import hashlib
 import random
+from functools import lru_cache
 
+from ..cache import _register_lru_cache
 from ..constants import DEFAULT_BLOCK_STYLE, TEXTURE_ROTATIONS
 from .colors import _clamp, _resolve_options
 
 def _resolve_block_style(options_payload):
     payload = _resolve_options(options_payload)
-    style = dict(DEFAULT_BLOCK_STYLE)
     incoming = payload.get("block_style")
-    if isinstance(incoming, dict):
-        style.update(incoming)
+    if not isinstance(incoming, dict):
+        return dict(_resolve_block_style_cached(()))
+    try:
+        key = tuple(sorted(incoming.items()))
+        hash(key)
+    except TypeError:
+        return _build_block_style(incoming)
+    return dict(_resolve_block_style_cached(key))
+
+
+@_register_lru_cache("resolved_styles")
+@lru_cache(maxsize=64)
+def _resolve_block_style_cached(key):
+    return _build_block_style(dict(key))
+
+
+def _build_block_style(incoming):
+    style = dict(DEFAULT_BLOCK_STYLE)
+    style.update(incoming)
     return {
         "border": _clamp(float(style.get("border", 0)), 0, 4),
         "border_blur": _clamp(float(style.get("border_blur", 0)), 0, 6),
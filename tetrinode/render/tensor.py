@@ -0,0 +1,18 @@
+import numpy as np
+import torch
+
+from ..constants import OUTPUT_PRECISIONS
+
+
+def _resolve_precision(precision):
+    return precision if precision in OUTPUT_PRECISIONS else OUTPUT_PRECISIONS[0]
+
+
+def _to_image_tensor(arr, precision="float32"):
+    """Wrap a uint8 (H, W, 3) frame, or a (K, H, W, 3) batch, as an IMAGE tensor.
+
+    IMAGE consumers expect floats in [0, 1], so only the float width varies.
+    """
+    dtype = np.float16 if _resolve_precision(precision) == "float16" else np.float32
+    tensor = torch.from_numpy(arr.astype(dtype) / dtype(255.0))
+    return tensor if arr.ndim == 4 else tensor[None, ...]
@@ -0,0 +1,346 @@
+"""Generate self-play transition shards.
+
+    python -m tetrinode.selfplay --out data/run1 --games 1000 --workers 8
+
+Each shard plays ``--games-per-shard`` games and is written as one
+compressed ``.npz`` (or a directory of memory-mappable ``.npy`` files with
+``--format npy``). ``manifest.json`` lists finished shards, so rerunning the
+same command resumes where it stopped.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import random
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from .constants import BOARD_HEIGHT, BOARD_WIDTH
+from .env import ACTIONS, VectorEnv
+from .game.features import _board_features
+from .game.finesse import _placements
+from .game.pieces import _piece_cells
+
+MANIFEST = "manifest.json"
+# Bag k of seed s is drawn from Random(s + k), so neighbouring seeds replay
+# each other's bags one bag apart. Games are spaced far enough apart that
+# their piece streams never overlap.
+SEED_STRIDE = 1 << 20
+FEATURE_NAMES = (
+    "aggregate_height",
+    "max_height",
+    "holes",
+    "bumpiness",
+    "max_well",
+    "row_transitions",
+    "column_transitions",
+    "t_slots",
+)
+# Settings that decide what a shard contains; --games may grow between runs.
+CONFIG_KEYS = ("seed", "games_per_shard", "policy", "max_steps", "format", "queue_size")
+_ACTION_IDS = {name: idx for idx, name in enumerate(ACTIONS)}
+_HEURISTIC_WEIGHTS = {"aggregate_height": -0.51, "holes": -0.36, "bumpiness": -0.18}
+_HEURISTIC_LINE_WEIGHT = 0.76
+
+
+def _random_policy(seed):
+    rng = random.Random(seed)
+    choices = range(len(ACTIONS))
+
+    def policy(state):
+        return rng.choice(choices)
+
+    return policy
+
+
+def _best_placement(state):
+    """Action path to the best-scoring reachable lock position, or None."""
+    board = np.array([[cell != 0 for cell in row] for row in state.board])
+    placements = _placements(state.board, state.piece, state.column_tops)
+    paths = []
+    cleared_counts = []
+    boards = []
+    for lock, path in placements.items():
+        placed = board.copy()
+        for cx, cy in _piece_cells(lock):
+            placed[cy, cx] = True
+        full = placed.all(axis=1)
+        cleared = int(full.sum())
+        if cleared:
+            kept = placed[~full]
+            placed = np.vstack([np.zeros((cleared, BOARD_WIDTH), dtype=bool), kept])
+        paths.append(path)
+        cleared_counts.append(cleared)
+        boards.append(placed)
+    if not paths:
+        return None
+    features = _board_features(np.stack(boards))
+    scores = np.array(cleared_counts) * _HEURISTIC_LINE_WEIGHT
+    for name, weight in _HEURISTIC_WEIGHTS.items():
+        scores = scores + features[name] * weight
+    return paths[int(scores.argmax())]
+
+
+def _heuristic_policy(seed):
+    """Greedy one-piece placement search with classic hand-tuned weights.
+
+    Placements come from the finesse solver, so tucks and spins are
+    candidates and the chosen path accounts for per-action gravity.
+    """
+    plan = {}
+
+    def policy(state):
+        key = (state.sequence.position, state.hold_used)
+        if plan.get("key") != key:
+            plan["key"] = key
+            plan["path"] = list(_best_placement(state) or ())
+            plan["path"].reverse()
+        if not plan["path"]:
+            return _ACTION_IDS["hard_drop"]
+        return _ACTION_IDS[plan["path"].pop()]
+
+    return policy
+
+
+POLICIES = {
+    "random": _random_policy,
+    "heuristic": _heuristic_policy,
+}
+
+
+def _load_policy(name):
+    if name in POLICIES:
+        return POLICIES[name]
+    module_name, _, attr = name.partition(":")
+    if not attr:
+        raise ValueError(
+            f"Unknown policy {name!r}; use one of {sorted(POLICIES)} or module:factory"
+        )
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def _shard_games(config, shard):
+    return min(config["games_per_shard"], config["games"] - shard * config["games_per_shard"])
+
+
+def _game_seed(config, shard, game):
+    return config["seed"] + (shard * config["games_per_shard"] + game) * SEED_STRIDE
+
+
+def _feature_vector(board):
+    features = _board_features(board)
+    return np.array([features[name] for name in FEATURE_NAMES], dtype=np.float32)
+
+
+def _play_game(env, policy, seed, max_steps, out):
+    obs = env.reset([seed])
+    state = env.states[0]
+    position = None
+    features = None
+    steps = 0
+    while steps < max_steps:
+        if state.sequence.position != position:
+            position = state.sequence.position
+            features = _feature_vector(obs["board"][0])
+        out["board"].append(np.packbits(obs["board"][0]))
+        out["piece"].append(obs["piece"][0].copy())
+        out["hold"].append(obs["hold"][0])
+        out["queue"].append(obs["queue"][0].copy())
+        out["features"].append(features)
+        action = policy(state)
+        obs, rewards, terminated, _, _ = env.step([action])
+        out["action"].append(action)
+        out["reward"].append(rewards[0])
+        out["done"].append(terminated[0])
+        steps += 1
+        if terminated[0]:
+            break
+    # The next state of transition t is the state of t + 1; the final one is
+    # stored alongside so every transition has a successor.
+    if state.sequence.position != position:
+        features = _feature_vector(obs["board"][0])
+    out["final_board"].append(np.packbits(obs["board"][0]))
+    out["final_piece"].append(obs["piece"][0].copy())
+    out["final_features"].append(features)
+    out["game_length"].append(steps)
+    return steps
+
+
+def _shard_path(out_dir, shard, fmt):
+    name = f"shard-{shard:05d}"
+    return os.path.join(out_dir, name + ".npz" if fmt == "npz" else name)
+
+
+def _write_shard(path, arrays, fmt):
+    tmp = path + ".tmp"
+    if fmt == "npz":
+        with open(tmp, "wb") as fp:
+            np.savez_compressed(fp, **arrays)
+    else:
+        if os.path.isdir(tmp):
+            shutil.rmtree(tmp)
+        os.makedirs(tmp)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp, name + ".npy"), array)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+    os.replace(tmp, path)
+
+
+def _run_shard(config, shard):
+    started = time.perf_counter()
+    policy_factory = _load_policy(config["policy"])
+    env = VectorEnv(1, queue_size=config["queue_size"], auto_reset=False)
+    keys = (
+        "board",
+        "piece",
+        "hold",
+        "queue",
+        "features",
+        "action",
+        "reward",
+        "done",
+        "final_board",
+        "final_piece",
+        "final_features",
+        "game_length",
+    )
+    out = {key: [] for key in keys}
+    games = _shard_games(config, shard)
+    seeds = []
+    for game in range(games):
+        seed = _game_seed(config, shard, game)
+        seeds.append(seed)
+        _play_game(env, policy_factory(seed), seed, config["max_steps"], out)
+    arrays = {
+        "board": np.array(out["board"], dtype=np.uint8).reshape(-1, BOARD_HEIGHT * BOARD_WIDTH // 8),
+        "piece": np.array(out["piece"], dtype=np.int16).reshape(-1, 4),
+        "hold": np.array(out["hold"], dtype=np.int8),
+        "queue": np.array(out["queue"], dtype=np.int8).reshape(-1, config["queue_size"]),
+        "features": np.array(out["features"], dtype=np.float32).reshape(-1, len(FEATURE_NAMES)),
+        "action": np.array(out["action"], dtype=np.int8),
+        "reward": np.array(out["reward"], dtype=np.float32),
+        "done": np.array(out["done"], dtype=bool),
+        "final_board": np.array(out["final_board"], dtype=np.uint8),
+        "final_piece": np.array(out["final_piece"], dtype=np.int16),
+        "final_features": np.array(out["final_features"], dtype=np.float32),
+        "game_length": np.array(out["game_length"], dtype=np.int64),
+        "game_seed": np.array(seeds, dtype=np.int64),
+    }
+    path = _shard_path(config["out"], shard, config["format"])
+    _write_shard(path, arrays, config["format"])
+    return {
+        "shard": shard,
+        "path": os.path.basename(path),
+        "games": games,
+        "transitions": int(arrays["action"].size),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def _load_manifest(out_dir, config):
+    path = os.path.join(out_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {"config": {key: config[key] for key in CONFIG_KEYS}, "shards": {}}
+    with open(path, encoding="utf-8") as fp:
+        manifest = json.load(fp)
+    saved = manifest.get("config", {})
+    changed = [key for key in CONFIG_KEYS if saved.get(key) != config[key]]
+    if changed:
+        raise SystemExit(
+            f"{path} was written with different settings ({', '.join(changed)}); "
+            "use a new --out directory"
+        )
+    return manifest
+
+
+def _save_manifest(out_dir, manifest):
+    path = os.path.join(out_dir, MANIFEST)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fp:
+        json.dump(manifest, fp, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _pending_shards(config, manifest):
+    total = -(-config["games"] // config["games_per_shard"])
+    # A trailing shard written for a smaller --games run is replayed in full.
+    done = {
+        int(shard)
+        for shard, entry in manifest["shards"].items()
+        if entry["games"] == _shard_games(config, int(shard))
+        and os.path.exists(os.path.join(config["out"], entry["path"]))
+    }
+    return total, [shard for shard in range(total) if shard not in done]
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m tetrinode.selfplay",
+        description="Play TetriNode games in parallel and write transition shards.",
+    )
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--games-per-shard", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--policy", default="heuristic", help="random, heuristic, or module:factory"
+    )
+    parser.add_argument("--max-steps", type=int, default=20000, help="step cap per game")
+    parser.add_argument("--format", choices=("npz", "npy"), default="npz")
+    parser.add_argument("--queue-size", type=int, default=5)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    config = {
+        "out": args.out,
+        "seed": args.seed,
+        "games": args.games,
+        "games_per_shard": max(1, args.games_per_shard),
+        "policy": args.policy,
+        "max_steps": args.max_steps,
+        "format": args.format,
+        "queue_size": args.queue_size,
+    }
+    _load_policy(config["policy"])
+    os.makedirs(config["out"], exist_ok=True)
+    manifest = _load_manifest(config["out"], config)
+    total, pending = _pending_shards(config, manifest)
+    if not pending:
+        print(f"all {total} shards already written to {config['out']}", file=sys.stderr)
+        return 0
+    print(
+        f"{len(pending)} of {total} shards to write ({total - len(pending)} already done)",
+        file=sys.stderr,
+    )
+    started = time.perf_counter()
+    transitions = 0
+    games = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = [pool.submit(_run_shard, config, shard) for shard in pending]
+        for finished, future in enumerate(as_completed(futures), start=1):
+            entry = future.result()
+            manifest["shards"][str(entry["shard"])] = entry
+            _save_manifest(config["out"], manifest)
+            transitions += entry["transitions"]
+            games += entry["games"]
+            elapsed = time.perf_counter() - started
+            print(
+                f"[{finished}/{len(pending)}] shard {entry['shard']}: "
+                f"{entry['transitions']} transitions in {entry['seconds']:.1f}s | "
+                f"total {transitions / elapsed:,.0f} steps/s, {games / elapsed:.2f} games/s",
+                file=sys.stderr,
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+import asyncio
+import base64
+import io
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from aiohttp import web
+from PIL import Image
+
+from .cache import _cache_stats
+from .constants import OUTPUT_SCALE
+from .game.engine import _advance_time, _apply_action_step
+from .render.board import _render_frame, _render_settings
+from .render.capture import _decode_data_url, _store_capture
+from .state.codec import _default_state, _deserialize_state, _state_to_dict
+from .state.store import _session_db
+from .warmup import _warmup_status
+
+ROUTE_PREFIX = "/tetrinode"
+PERSIST_SESSIONS_ENV = "TETRINODE_PERSIST_SESSIONS"
+MAX_SESSIONS = 64
+SESSION_TTL_SECONDS = 30 * 60
+FRAME_FORMATS = {"png": ("PNG", "image/png"), "webp": ("WEBP", "image/webp")}
+LIVE_ACTIONS = {
+    "none",
+    "left",
+    "right",
+    "down",
+    "rotate_cw",
+    "rotate_ccw",
+    "soft_drop",
+    "hard_drop",
+    "hold",
+    "advance_ms",
+    "new",
+}
+
+
+class LiveSession:
+    __slots__ = ("session_id", "seed", "state", "lock", "touched")
+
+    def __init__(self, session_id, seed, state):
+        self.session_id = session_id
+        self.seed = seed
+        self.state = state
+        self.lock = asyncio.Lock()
+        self.touched = time.monotonic()
+
+
+class SessionStore:
+    """Live-play sessions, evicted from memory by idle time and by count.
+
+    With a ``SessionDatabase`` every session is also written through to
+    disk, so an evicted session or one from before a restart is reloaded
+    on its next lookup. ``database`` may also be a zero-argument factory,
+    called on first use, so the store opens nothing until a session does.
+    Methods are thread-safe; the routes call them from the executor so disk
+    I/O stays off the event loop.
+    """
+
+    def __init__(self, max_sessions=MAX_SESSIONS, ttl=SESSION_TTL_SECONDS, database=None):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._database = database
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def database(self):
+        if callable(self._database):
+            with self._lock:
+                if callable(self._database):
+                    self._database = self._database()
+        return self._database
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def create(self, seed, state_json=None):
+        state = _deserialize_state(state_json, seed) if state_json else _default_state(seed)
+        with self._lock:
+            self._evict()
+            session = self._add(LiveSession(uuid.uuid4().hex, seed, state))
+        self.persist(session)
+        return session
+
+    def _add(self, session):
+        # A concurrent lookup may have reloaded the same session first.
+        session = self._sessions.setdefault(session.session_id, session)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return session
+
+    def get(self, session_id):
+        with self._lock:
+            self._evict()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.touched = time.monotonic()
+                self._sessions.move_to_end(session_id)
+                return session
+        if self.database is None:
+            return None
+        state = self.database.load(session_id)
+        if state is None:
+            return None
+        with self._lock:
+            return self._add(LiveSession(session_id, state.seed, state))
+
+    def persist(self, session):
+        if self.database is not None:
+            self.database.save(session.session_id, session.state)
+
+    def delete(self, session_id):
+        with self._lock:
+            deleted = self._sessions.pop(session_id, None) is not None
+        if self.database is not None:
+            deleted = self.database.delete(session_id) or deleted
+        return deleted
+
+    def _evict(self):
+        cutoff = time.monotonic() - self.ttl
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.touched >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+
+
+def _persist_sessions():
+    value = os.environ.get(PERSIST_SESSIONS_ENV, "")
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _live_session_db():
+    """The shared session database when persistence is enabled, else None."""
+    return _session_db() if _persist_sessions() else None
+
+
+_STORE = SessionStore(database=_live_session_db)
+
+
+def _step_session(store, session, action, elapsed_ms=0):
+    if action == "new":
+        session.state = _default_state(session.seed)
+    elif action == "advance_ms":
+        _advance_time(session.state, elapsed_ms)
+    elif not session.state.game_over:
+        _apply_action_step(session.state, action)
+    store.persist(session)
+    return session.state
+
+
+def _encode_frame(state, block_size, output_scale, fmt):
+    settings = _render_settings(state.options, output_scale)
+    frame = _render_frame(
+        state.board,
+        state.piece,
+        block_size * output_scale,
+        seed=state.seed,
+        column_tops=state.column_tops,
+        **settings,
+    )
+    pil_format, mime = FRAME_FORMATS[fmt]
+    buffer = io.BytesIO()
+    Image.fromarray(frame, "RGB").save(buffer, pil_format)
+    encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
+    return f"data:{mime};base64,{encoded}"
+
+
+def _session_payload(session, frame=None):
+    payload = {"session": session.session_id, "state": _state_to_dict(session.state)}
+    if frame is not None:
+        payload["frame"] = frame
+    return payload
+
+
+async def _read_json(request):
+    if not request.can_read_body:
+        return {}
+    try:
+        body = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(text="Body must be JSON") from None
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text="Body must be a JSON object")
+    return body
+
+
+def _int_field(body, key, default, low=None, high=None):
+    try:
+        value = int(body.get(key, default))
+    except (TypeError, ValueError):
+        raise web.HTTPBadRequest(text=f"{key} must be an integer") from None
+    if low is not None:
+        value = max(low, value)
+    if high is not None:
+        value = min(high, value)
+    return value
+
+
+def _register_routes(routes, store=None):
+    if store is None:
+        store = _STORE
+
+    async def lookup(request):
+        loop = asyncio.get_running_loop()
+        session = await loop.run_in_executor(None, store.get, request.match_info["session_id"])
+        if session is None:
+            raise web.HTTPNotFound(text="Unknown session")
+        return session
+
+    @routes.post(f"{ROUTE_PREFIX}/session")
+    async def create_session(request):
+        body = await _read_json(request)
+        seed = _int_field(body, "seed", 0, low=0)
+        state_json = body.get("state")
+        if state_json is not None and not isinstance(state_json, str):
+            raise web.HTTPBadRequest(text="state must be a serialized state string")
+        loop = asyncio.get_running_loop()
+        session = await loop.run_in_executor(None, store.create, seed, state_json)
+        return web.json_response(_session_payload(session))
+
+    @routes.post(f"{ROUTE_PREFIX}/session/{{session_id}}/step")
+    async def step_session(request):
+        session = await lookup(request)
+        body = await _read_json(request)
+        action = body.get("action", "none")
+        if action not in LIVE_ACTIONS:
+            raise web.HTTPBadRequest(text=f"Unknown action {action!r}")
+        fmt = body.get("frame")
+        if fmt is not None and fmt not in FRAME_FORMATS:
+            raise web.HTTPBadRequest(text=f"frame must be one of {sorted(FRAME_FORMATS)}")
+        block_size = _int_field(body, "block_size", 20, low=8, high=48)
+        output_scale = _int_field(body, "output_scale", OUTPUT_SCALE, low=1, high=OUTPUT_SCALE)
+        elapsed_ms = _int_field(body, "elapsed_ms", 0, low=0)
+        loop = asyncio.get_running_loop()
+        # Engine and render work run off the event loop; the per-session lock
+        # keeps one session's actions strictly ordered.
+        async with session.lock:
+            state = await loop.run_in_executor(
+                None, _step_session, store, session, action, elapsed_ms
+            )
+            frame = None
+            if fmt is not None:
+                frame = await loop.run_in_executor(
+                    None, _encode_frame, state, block_size, output_scale, fmt
+                )
+            return web.json_response(_session_payload(session, frame))
+
+    @routes.get(f"{ROUTE_PREFIX}/session/{{session_id}}")
+    async def get_session(request):
+        return web.json_response(_session_payload(await lookup(request)))
+
+    @routes.delete(f"{ROUTE_PREFIX}/session/{{session_id}}")
+    async def delete_session(request):
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(None, store.delete, request.match_info["session_id"]):
+            raise web.HTTPNotFound(text="Unknown session")
+        return web.json_response({"deleted": True})
+
+    @routes.post(f"{ROUTE_PREFIX}/capture")
+    async def upload_capture(request):
+        if request.content_type == "image/png":
+            payload = await request.read()
+        else:
+            data = (await _read_json(request)).get("data")
+            if not isinstance(data, str):
+                raise web.HTTPBadRequest(text="data must be a PNG data URL")
+            try:
+                payload = _decode_data_url(data)
+            except ValueError:
+                raise web.HTTPBadRequest(text="data must be a PNG data URL") from None
+        loop = asyncio.get_running_loop()
+        try:
+            ref = await loop.run_in_executor(None, _store_capture, payload)
+        except (OSError, ValueError) as exc:
+            raise web.HTTPBadRequest(text=f"Invalid capture: {exc}") from None
+        return web.json_response({"hash": ref})
+
+    @routes.get(f"{ROUTE_PREFIX}/cache/stats")
+    async def cache_stats(request):
+        return web.json_response({**_cache_stats(), "warmup": _warmup_status()})
+
+    return routes
+
+
+def _make_app(store=None):
+    routes = web.RouteTableDef()
+    _register_routes(routes, SessionStore() if store is None else store)
+    app = web.Application()
+    app.add_routes(routes)
+    return app
+
+
+def _register_prompt_server_routes():
+    try:
+        from server import PromptServer
+
+        routes = PromptServer.instance.routes
+    except (ImportError, AttributeError):
+        return False
+    _register_routes(routes)
+    return True
@@ -1,41 +1,30 @@
 import json
 
 from ..constants import BOARD_HEIGHT, BOARD_WIDTH, SHAPES, STATE_VERSION
-from ..game.pieces import _collides
-from ..game.rng import _empty_board, _pop_shape, _spawn_piece
+from ..game.pieces import _collides, _column_tops, _row_fills
+from ..game.rng import BAG_SIZE, PieceSequence, _empty_board, _pop_shape, _spawn_piece
+from ..game.zobrist import _board_hash, _compose_hash, _state_hash
+from .schema import EngineState, GameState, Piece
+
+_STATE_FIELDS = tuple(
+    key
+    for key in GameState.__annotations__
+    if key not in {"piece", "bag", "bag_count", "zobrist"}
+)
 
 def _default_state(seed):
-    state = {
-        "version": STATE_VERSION,
-        "board": _empty_board(),
-        "bag": [],
-        "bag_count": 0,
-        "seed": seed,
-        "start_level": 1,
-        "level_progression": "fixed",
-        "level": 1,
-        "piece": None,
-        "next_piece_shape": None,
-        "hold_piece_shape": None,
-        "hold_used": False,
-        "score": 0,
-        "lines_cleared_total": 0,
-        "tetrises": 0,
-        "tspins": 0,
-        "combo_streak": 0,
-        "combo_total": 0,
-        "goal_lines_total": 0.0,
-        "b2b_active": False,
-        "game_over": False,
-        "last_action": None,
-        "last_rotate_kick": None,
-        "tspin": "none",
-        "options": {},
-    }
-    state["piece"] = _spawn_piece(_pop_shape(state))
-    state["next_piece_shape"] = _pop_shape(state)
-    if _collides(state["board"], state["piece"]):
-        state["game_over"] = True
+    board = _empty_board()
+    state = EngineState(
+        seed=seed,
+        board=board,
+        sequence=PieceSequence(seed),
+        column_tops=_column_tops(board),
+        row_fills=_row_fills(board),
+    )
+    state.piece = _spawn_piece(_pop_shape(state))
+    state.next_piece_shape = _pop_shape(state)
+    if _collides(state.board, state.piece):
+        state.game_over = True
     return state
 
 
@@ -52,55 +41,119 @@ def _deserialize_state(state_json, seed, enforce_seed=True):
         return _default_state(seed)
     board = state.get("board")
     piece = state.get("piece")
-    if not _valid_board(board) or not _valid_piece(piece):
+    if not _valid_piece(piece):
+        return _default_state(seed)
+    board_hash = _verified_board_hash(state)
+    if board_hash is None and not _valid_board(board):
         return _default_state(seed)
     if enforce_seed and state.get("seed") != seed:
         return _default_state(seed)
     if "bag" not in state or "bag_count" not in state:
         state["bag"] = []
         state["bag_count"] = 0
-    next_shape = state.get("next_piece_shape")
-    if next_shape not in SHAPES:
-        state["next_piece_shape"] = _pop_shape(state)
-    if "score" not in state:
-        state["score"] = 0
-    if "lines_cleared_total" not in state:
-        state["lines_cleared_total"] = 0
-    if "tetrises" not in state:
-        state["tetrises"] = 0
-    if "tspins" not in state:
-        state["tspins"] = 0
-    if "combo_streak" not in state:
-        state["combo_streak"] = 0
-    if "combo_total" not in state:
-        state["combo_total"] = 0
     if "goal_lines_total" not in state:
         state["goal_lines_total"] = float(state.get("lines_cleared_total", 0))
-    if "b2b_active" not in state:
-        state["b2b_active"] = False
-    if "game_over" not in state:
-        state["game_over"] = False
-    if "start_level" not in state:
-        state["start_level"] = 1
-    if "level_progression" not in state:
-        state["level_progression"] = "fixed"
     if "level" not in state:
         state["level"] = state.get("start_level", 1)
-    if "last_action" not in state:
-        state["last_action"] = None
-    if "last_rotate_kick" not in state:
-        state["last_rotate_kick"] = None
-    if "tspin" not in state:
-        state["tspin"] = "none"
-    if "options" not in state:
-        state["options"] = {}
-    if "hold_piece_shape" not in state:
-        state["hold_piece_shape"] = None
     if state.get("hold_piece_shape") not in SHAPES:
         state["hold_piece_shape"] = None
-    if "hold_used" not in state:
-        state["hold_used"] = False
-    return state
+    engine_state = _state_from_dict(state, board_hash)
+    if engine_state.next_piece_shape not in SHAPES:
+        engine_state.next_piece_shape = _pop_shape(engine_state)
+    return engine_state
+
+
+def _state_seed(state_json):
+    """The ``seed`` field of a serialized state, or None if it has none."""
+    try:
+        state = json.loads(state_json)
+    except (TypeError, json.JSONDecodeError):
+        return None
+    return state.get("seed") if isinstance(state, dict) else None
+
+
+def _deserialize_states(payload):
+    """Parse several states from a JSON list, a single state, or one per line."""
+    if not payload or not payload.strip():
+        return []
+    try:
+        items = json.loads(payload)
+    except json.JSONDecodeError:
+        items = [line for line in payload.splitlines() if line.strip()]
+    if isinstance(items, dict):
+        items = [items]
+    if not isinstance(items, list):
+        return []
+    states = []
+    for item in items:
+        if isinstance(item, dict):
+            item = json.dumps(item)
+        if isinstance(item, str):
+            states.append(_deserialize_state(item, 0, enforce_seed=False))
+    return states
+
+
+def _serialize_state(state):
+    return json.dumps(_state_to_dict(state))
+
+
+def _state_from_dict(state, board_hash=None):
+    engine_state = EngineState()
+    for key in _STATE_FIELDS:
+        if key in state:
+            setattr(engine_state, key, state[key])
+    piece = state.get("piece")
+    engine_state.piece = Piece(piece["shape"], piece["rot"], piece["x"], piece["y"])
+    engine_state.sequence = PieceSequence(
+        engine_state.seed, state.get("bag", []), state.get("bag_count", 0)
+    )
+    engine_state.column_tops = _column_tops(engine_state.board)
+    engine_state.row_fills = _row_fills(engine_state.board)
+    engine_state.board_hash = (
+        _board_hash(engine_state.board) if board_hash is None else board_hash
+    )
+    return engine_state
+
+
+def _state_to_dict(state):
+    payload = {key: getattr(state, key) for key in _STATE_FIELDS}
+    payload["piece"] = state.piece._asdict() if state.piece is not None else None
+    payload["bag"] = state.sequence.bag
+    payload["bag_count"] = state.sequence.bag_count
+    # Hex, since JSON numbers past 2**53 lose precision in the browser.
+    payload["zobrist"] = f"{_state_hash(state):016x}" if state.piece is not None else None
+    return payload
+
+
+def _verified_board_hash(state):
+    """The board's hash when the state's ``zobrist`` checks out, else None.
+
+    Hashing looks every filled cell up by shape, so a match stands in for the
+    per-cell checks of ``_valid_board``; only the row shapes are checked here.
+    """
+    expected = state.get("zobrist")
+    board = state.get("board")
+    if not isinstance(expected, str) or not isinstance(board, list):
+        return None
+    if len(board) != BOARD_HEIGHT or any(
+        type(row) is not list or len(row) != BOARD_WIDTH for row in board
+    ):
+        return None
+    piece = state["piece"]
+    try:
+        board_hash = _board_hash(board)
+        actual = _compose_hash(
+            board_hash,
+            (piece["shape"], piece["rot"], piece["x"], piece["y"]),
+            state.get("hold_piece_shape"),
+            state.get("hold_used", False),
+            state.get("next_piece_shape"),
+            state.get("seed", 0),
+            state.get("bag_count", 0) * BAG_SIZE - len(state.get("bag", [])),
+        )
+    except (KeyError, TypeError):
+        return None
+    return board_hash if f"{actual:016x}" == expected else None
 
 
 def _valid_board(board):
@@ -1,4 +1,10 @@
-from typing import Any, TypedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, NamedTuple, TypedDict
+
+from ..constants import STATE_VERSION
+
+if TYPE_CHECKING:
+    from ..game.rng import PieceSequence
 
 
 class PieceState(TypedDict):
@@ -22,6 +28,8 @@ class GameState(TypedDict, total=False):
     hold_piece_shape: str | None
     hold_used: bool
     score: int
+    time_ms: int
+    gravity_elapsed_ms: int
     lines_cleared_total: int
     tetrises: int
     tspins: int
@@ -34,3 +42,58 @@ class GameState(TypedDict, total=False):
     last_rotate_kick: int | None
     tspin: str
     options: dict[str, Any]
+    zobrist: str
+
+
+class Piece(NamedTuple):
+    """Immutable engine-side piece record; serialized as ``PieceState``."""
+
+    shape: str
+    rot: int
+    x: int
+    y: int
+
+
+@dataclass(slots=True)
+class EngineState:
+    """Slotted engine-side mirror of ``GameState``.
+
+    The codec converts to and from the JSON schema, so the engine never
+    touches dict-shaped states in its hot loop. ``column_tops`` (highest
+    occupied row per column, ``BOARD_HEIGHT`` when empty) and ``row_fills``
+    (occupied cells per row) are derived engine bookkeeping, rebuilt from the
+    board rather than serialized, as is ``board_hash`` (Zobrist hash of the
+    filled cells, kept current on lock and line clear). The JSON ``zobrist``
+    is the full state hash built from it. ``sequence`` replaces the JSON
+    ``bag`` and ``bag_count`` pair.
+    """
+
+    seed: int = 0
+    board: list[list[Any]] = field(default_factory=list)
+    sequence: "PieceSequence | None" = None
+    version: int = STATE_VERSION
+    start_level: int = 1
+    level_progression: str = "fixed"
+    level: int = 1
+    piece: Piece | None = None
+    next_piece_shape: str | None = None
+    hold_piece_shape: str | None = None
+    hold_used: bool = False
+    score: int = 0
+    time_ms: int = 0
+    gravity_elapsed_ms: int = 0
+    lines_cleared_total: int = 0
+    tetrises: int = 0
+    tspins: int = 0
+    combo_streak: int = 0
+    combo_total: int = 0
+    goal_lines_total: float = 0.0
+    b2b_active: bool = False
+    game_over: bool = False
+    last_action: str | None = None
+    last_rotate_kick: int | None = None
+    tspin: str = "none"
+    options: dict[str, Any] = field(default_factory=dict)
+    column_tops: list[int] = field(default_factory=list)
+    row_fills: list[int] = field(default_factory=list)
+    board_hash: int = 0
@@ -0,0 +1,189 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+
+from .codec import _deserialize_state, _state_to_dict
+
+SESSION_DB_ENV = "TETRINODE_SESSION_DB"
+SESSION_DB_NAME = "sessions.sqlite3"
+MAX_STORED_SESSIONS = 10000
+STORED_SESSION_TTL_SECONDS = 7 * 24 * 60 * 60
+CHECKPOINT_INTERVAL = 50
+CHECKPOINTS_PER_SESSION = 8
+# Retention is enforced every this many writes rather than on each one.
+PRUNE_EVERY = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    state BLOB NOT NULL,
+    steps INTEGER NOT NULL DEFAULT 0,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    session_id TEXT NOT NULL,
+    step INTEGER NOT NULL,
+    state BLOB NOT NULL,
+    PRIMARY KEY (session_id, step)
+) WITHOUT ROWID;
+"""
+
+
+def _default_db_path():
+    path = os.environ.get(SESSION_DB_ENV)
+    if path:
+        return path
+    try:
+        import folder_paths
+
+        base = folder_paths.get_user_directory()
+    except (ImportError, AttributeError):
+        base = tempfile.gettempdir()
+    return os.path.join(base, "tetrinode", SESSION_DB_NAME)
+
+
+def _pack_state(state):
+    payload = json.dumps(_state_to_dict(state), separators=(",", ":"))
+    return zlib.compress(payload.encode("utf-8"))
+
+
+def _unpack_state(blob):
+    state_json = zlib.decompress(blob).decode("utf-8")
+    return _deserialize_state(state_json, 0, enforce_seed=False)
+
+
+class SessionDatabase:
+    """Durable game states and replay checkpoints keyed by session id.
+
+    States are stored as zlib-compressed state JSON in SQLite running in WAL
+    mode, so every write is an atomic transaction that survives a crash and
+    readers never block the writer. Each thread uses its own connection.
+    """
+
+    def __init__(
+        self,
+        path=None,
+        max_sessions=MAX_STORED_SESSIONS,
+        ttl=STORED_SESSION_TTL_SECONDS,
+        checkpoint_interval=CHECKPOINT_INTERVAL,
+        checkpoints_per_session=CHECKPOINTS_PER_SESSION,
+    ):
+        self.path = path or _default_db_path()
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoints_per_session = checkpoints_per_session
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def load(self, session_id):
+        row = self._connection().execute(
+            "SELECT state FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return _unpack_state(row[0]) if row else None
+
+    def save(self, session_id, state):
+        """Store the latest state, adding a checkpoint every few steps."""
+        blob = _pack_state(state)
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO sessions (session_id, state, steps, updated) VALUES (?, ?, 0, ?) "
+                "ON CONFLICT (session_id) DO UPDATE SET "
+                "state = excluded.state, steps = steps + 1, updated = excluded.updated",
+                (session_id, blob, time.time()),
+            )
+            steps = conn.execute(
+                "SELECT steps FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            if self.checkpoint_interval and steps % self.checkpoint_interval == 0:
+                conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints (session_id, step, state) VALUES (?, ?, ?)",
+                    (session_id, steps, blob),
+                )
+                conn.execute(
+                    "DELETE FROM checkpoints WHERE session_id = ? AND step <= ?",
+                    (session_id, steps - self.checkpoint_interval * self.checkpoints_per_session),
+                )
+        self._writes += 1
+        if self._writes % PRUNE_EVERY == 0:
+            self.prune()
+        return steps
+
+    def checkpoints(self, session_id):
+        rows = self._connection().execute(
+            "SELECT step FROM checkpoints WHERE session_id = ? ORDER BY step", (session_id,)
+        )
+        return [row[0] for row in rows]
+
+    def load_checkpoint(self, session_id, step):
+        row = self._connection().execute(
+            "SELECT state FROM checkpoints WHERE session_id = ? AND step = ?", (session_id, step)
+        ).fetchone()
+        return _unpack_state(row[0]) if row else None
+
+    def delete(self, session_id):
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM checkpoints WHERE session_id = ?", (session_id,))
+            deleted = conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        return deleted.rowcount > 0
+
+    def prune(self):
+        """Drop sessions idle past the TTL, then the oldest beyond the cap."""
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM sessions WHERE updated < ?", (time.time() - self.ttl,))
+            conn.execute(
+                "DELETE FROM sessions WHERE session_id IN ("
+                "SELECT session_id FROM sessions ORDER BY updated DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,),
+            )
+            conn.execute(
+                "DELETE FROM checkpoints WHERE session_id NOT IN (SELECT session_id FROM sessions)"
+            )
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_DATABASE = None
+_DATABASE_LOCK = threading.Lock()
+
+
+def _session_db():
+    """The shared on-disk store, or None when it cannot be opened."""
+    global _DATABASE
+    if _DATABASE is None:
+        with _DATABASE_LOCK:
+            if _DATABASE is None:
+                try:
+                    _DATABASE = SessionDatabase()
+                except (sqlite3.Error, OSError):
+                    return None
+    return _DATABASE
@@ -0,0 +1,171 @@
+"""Warm the render caches in a background thread after the nodes register.
+
+The first step in a fresh worker otherwise pays for scanning and decoding
+the textures, building a block sprite per piece color and the first numpy
+and torch conversions. Set ``TETRINODE_WARMUP=0`` to skip it.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+import torch
+
+from .assets.textures import _load_texture_data, _load_texture_image
+from .constants import (
+    BOARD_HEIGHT,
+    BOARD_WIDTH,
+    HIDDEN_ROWS,
+    OUTPUT_PRECISIONS,
+    OUTPUT_SCALE,
+    SHAPES,
+    TEXTURE_DATA_MAP,
+)
+from .render.board import _prepare_background, _render, _render_settings
+from .render.preview import _render_side_outputs
+from .render.tensor import _to_image_tensor
+from .state.codec import _default_state
+
+WARMUP_ENV = "TETRINODE_WARMUP"
+# The node's default block size, at the default output scale and at 1x.
+WARMUP_BLOCK_SIZE = 20
+WARMUP_SCALES = (OUTPUT_SCALE, 1)
+
+
+class WarmupStatus:
+    """Thread-safe progress record for the stats route."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.state = "idle"
+        self.tasks = []
+        self.completed = 0
+        self.current = None
+        self.started = None
+        self.finished = None
+        self.errors = {}
+
+    def begin(self, tasks):
+        with self._lock:
+            self.state = "running"
+            self.tasks = list(tasks)
+            self.completed = 0
+            self.started = time.perf_counter()
+
+    def step(self, name, error=None):
+        with self._lock:
+            if error is not None:
+                self.errors[name] = error
+            self.completed += 1
+
+    def set_current(self, name):
+        with self._lock:
+            self.current = name
+
+    def finish(self, state="done"):
+        with self._lock:
+            self.state = state
+            self.current = None
+            self.finished = time.perf_counter()
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = None
+            if self.started is not None:
+                elapsed = round(((self.finished or time.perf_counter()) - self.started) * 1000, 1)
+            return {
+                "state": self.state,
+                "completed": self.completed,
+                "total": len(self.tasks),
+                "current": self.current,
+                "elapsed_ms": elapsed,
+                "errors": dict(self.errors),
+            }
+
+
+def _swatch_state():
+    """Default state whose visible rows hold every piece color."""
+    state = _default_state(0)
+    shapes = list(SHAPES)
+    for y in range(BOARD_HEIGHT - len(shapes), BOARD_HEIGHT):
+        state.board[y] = [shapes[y % len(shapes)]] * (BOARD_WIDTH - 1) + [0]
+    state.column_tops = [BOARD_HEIGHT - len(shapes)] * (BOARD_WIDTH - 1) + [BOARD_HEIGHT]
+    state.hold_piece_shape = shapes[0]
+    return state
+
+
+def _warm_tensors():
+    frame = np.zeros((HIDDEN_ROWS, BOARD_WIDTH, 3), dtype=np.uint8)
+    for precision in OUTPUT_PRECISIONS:
+        _to_image_tensor(frame, precision)
+    _prepare_background(torch.zeros((1, 8, 8, 3)), BOARD_WIDTH, HIDDEN_ROWS)
+
+
+def _warm_frame(output_scale):
+    state = _swatch_state()
+    settings = _render_settings(state.options, output_scale)
+    block_size = WARMUP_BLOCK_SIZE * output_scale
+    _render(
+        state.board,
+        state.piece,
+        block_size,
+        seed=state.seed,
+        column_tops=state.column_tops,
+        **settings,
+    )
+    _render_side_outputs(state, block_size, settings["colors"], settings["style"], state.seed)
+
+
+def _warmup_tasks():
+    tasks = [("texture_data", _load_texture_data)]
+    for texture_id in TEXTURE_DATA_MAP:
+        tasks.append((f"texture:{texture_id}", lambda tid=texture_id: _load_texture_image(tid)))
+    tasks.append(("tensors", _warm_tensors))
+    for scale in WARMUP_SCALES:
+        tasks.append((f"frame:{WARMUP_BLOCK_SIZE * scale}px", lambda s=scale: _warm_frame(s)))
+    return tasks
+
+
+def _run_warmup(status, tasks):
+    status.begin(name for name, _ in tasks)
+    for name, task in tasks:
+        status.set_current(name)
+        try:
+            task()
+        except Exception as exc:
+            status.step(name, f"{type(exc).__name__}: {exc}")
+        else:
+            status.step(name)
+    status.finish()
+
+
+WARMUP = WarmupStatus()
+_WARMUP_LOCK = threading.Lock()
+_WARMUP_THREAD = None
+
+
+def _warmup_enabled():
+    return os.environ.get(WARMUP_ENV, "1").strip().lower() not in {"0", "false", "no", "off"}
+
+
+def _start_warmup():
+    """Start the warm-up thread once; returns it, or None when disabled."""
+    global _WARMUP_THREAD
+    if not _warmup_enabled():
+        WARMUP.finish("disabled")
+        return None
+    with _WARMUP_LOCK:
+        if _WARMUP_THREAD is None:
+            _WARMUP_THREAD = threading.Thread(
+                target=_run_warmup,
+                args=(WARMUP, _warmup_tasks()),
+                name="tetrinode-warmup",
+                daemon=True,
+            )
+            _WARMUP_THREAD.start()
+    return _WARMUP_THREAD
+
+
+def _warmup_status():
+    return WARMUP.snapshot()